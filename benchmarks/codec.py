@@ -0,0 +1,97 @@
+"""Per-note parse/serialize cost of the markdown codec, before and after.
+
+"before" is the python-frontmatter path the codec replaced (with whichever
+YAML loader/dumper it picks); "after" is `leto.markdown`. Run with
+
+    python benchmarks/codec.py [--notes 2000] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import frontmatter
+
+from leto.markdown import _metadata, _render_body, note_from_markdown, note_to_markdown
+from leto.model import (
+    Edge, EdgeType, ExperiencePayload, FactPayload, Kind, Note, Outcome,
+    ProcedurePayload, Settlement,
+)
+
+WORDS = ("graph note fact step edge settle recall index cache vector proof "
+         "lemma turing enigma water compute rice cook").split()
+
+
+def sample_notes(n: int, seed: int = 0) -> list[Note]:
+    rng = random.Random(seed)
+
+    def text(k: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(k))
+
+    notes = []
+    for i in range(n):
+        kind = rng.choice(list(Kind))
+        payload = {
+            Kind.FACT: lambda: FactPayload(definition=text(rng.randint(5, 40))),
+            Kind.PROCEDURE: lambda: ProcedurePayload(goal=text(rng.randint(3, 12))),
+            Kind.EXPERIENCE: lambda: ExperiencePayload(
+                situation=text(12), action=text(8), outcome=rng.choice(list(Outcome)),
+                lesson=text(10)),
+        }[kind]()
+        notes.append(Note(
+            slug=f"note-{i}", kind=kind, title=text(3).title(),
+            settlement=rng.choice(list(Settlement)),
+            sources=[f"https://example.org/{i}/{j}" for j in range(rng.randint(0, 2))],
+            aliases=[f"alias-{i}"] if rng.random() < 0.2 else [],
+            valid_from="2026-07-04T10:00:00+00:00",
+            recorded_at="2026-07-04T10:00:00.123456+00:00",
+            edges=[Edge(target=f"note-{rng.randrange(n)}", type=rng.choice(list(EdgeType)),
+                        order=j if rng.random() < 0.3 else None)
+                   for j in range(rng.randint(0, 4))],
+            payload=payload))
+    return notes
+
+
+def legacy_to_markdown(note: Note) -> str:
+    return frontmatter.dumps(frontmatter.Post(_render_body(note), **_metadata(note)))
+
+
+def legacy_from_markdown(text: str, slug: str) -> Note:
+    from leto.markdown import _note
+    return _note(frontmatter.loads(text).metadata, slug)
+
+
+def per_note_us(fn, args: list[tuple], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for a in args:
+            fn(*a)
+        best = min(best, time.perf_counter() - start)
+    return best / len(args) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    notes = sample_notes(args.notes)
+    texts = [(note_to_markdown(n), n.slug) for n in notes]
+    assert all(legacy_to_markdown(n) == t for n, (t, _) in zip(notes, texts))
+    rows = [
+        ("serialize", per_note_us(legacy_to_markdown, [(n,) for n in notes], args.repeat),
+         per_note_us(note_to_markdown, [(n,) for n in notes], args.repeat)),
+        ("parse", per_note_us(legacy_from_markdown, texts, args.repeat),
+         per_note_us(note_from_markdown, texts, args.repeat)),
+    ]
+    print(f"{args.notes} notes, best of {args.repeat}, microseconds per note")
+    print(f"{'':<10}{'before':>10}{'after':>10}{'speedup':>10}")
+    for name, before, after in rows:
+        print(f"{name:<10}{before:>10.1f}{after:>10.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
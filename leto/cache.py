@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+
+from leto.model import Note
+
+# (st_mtime_ns, st_size) of the markdown file a cached note was parsed from.
+Stamp = tuple[int, int]
+
+
+class NoteCache:
+    """A bounded LRU of parsed notes, keyed by slug and validated against the
+    stamp of the file they came from, so out-of-band edits are re-read.
+
+    The cost of an entry is the size of its markdown file — a stable proxy for
+    the parsed note's footprint. `max_bytes=0` disables caching."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[Stamp, Note, int]] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._entries
+
+    def get(self, slug: str, stamp: Stamp) -> Note | None:
+        """A private copy of the cached note, or None on a miss or stale entry."""
+        entry = self._entries.get(slug)
+        if entry is None or entry[0] != stamp:
+            if entry is not None:
+                self.discard(slug)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(slug)
+        self.hits += 1
+        return entry[1].model_copy(deep=True)
+
+    def stamp(self, slug: str) -> Stamp | None:
+        """The stamp `slug` was cached under, without counting a lookup."""
+        entry = self._entries.get(slug)
+        return entry[0] if entry is not None else None
+
+    def put(self, slug: str, stamp: Stamp, note: Note) -> None:
+        self.discard(slug)
+        cost = stamp[1]
+        if cost > self.max_bytes:
+            return
+        self._entries[slug] = (stamp, note.model_copy(deep=True), cost)
+        self._bytes += cost
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def discard(self, slug: str) -> None:
+        entry = self._entries.pop(slug, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._entries), "bytes": self._bytes,
+                "max_bytes": self.max_bytes}
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from typing import Protocol, runtime_checkable
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    """A local embedding model. `embed` is synchronous and CPU/GPU bound; the
+    store runs it off the event loop, in batches."""
+
+    model_id: str
+
+    def embed(self, texts: list[str]) -> list[list[float]]: ...
+
+
+def key_digest(model_id: str, text: str) -> str:
+    """Content address of an embedding: the model and the exact text embedded."""
+    return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).hexdigest()
+
+
+class MicroBatcher:
+    """Coalesces concurrent `embed` calls into batches of at most `max_batch`
+    texts, flushed when full or `max_delay` seconds after the first waiter."""
+
+    def __init__(self, embedder: Embedder, max_batch: int = 64, max_delay: float = 0.005):
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self._pending: dict[str, asyncio.Future] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        future = self._pending.get(text)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.max_delay, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            self.batches += 1
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        try:
+            vectors = await asyncio.to_thread(self.embedder.embed, texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"embedder returned {len(vectors)} vectors "
+                                 f"for {len(texts)} texts")
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for text, vector in zip(texts, vectors):
+            if not batch[text].done():
+                batch[text].set_result(list(vector))
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from bisect import insort
+from collections.abc import Callable, Iterable, Mapping
+from itertools import count
+
+from leto.model import EdgeType
+
+# Edges of a node come back grouped by type in EdgeType declaration order,
+# ordered edges (STEP) by their `order`, the rest in insertion order.
+_RANK: dict[EdgeType, int] = {t: i for i, t in enumerate(EdgeType)}
+_UNORDERED = float("inf")
+
+# (sort key, type, other endpoint, order)
+_Entry = tuple[tuple[int, float, int], EdgeType, str, int | None]
+
+
+class Adjacency:
+    """In-memory typed adjacency of the edge graph, kept in both directions so
+    `neighbors`/`backlinks` of a node are one dict lookup regardless of type."""
+
+    def __init__(self):
+        self._out: dict[str, list[_Entry]] = {}
+        self._in: dict[str, list[_Entry]] = {}
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._out.values())
+
+    def add(self, source: str, target: str, type: EdgeType,
+            order: int | None = None) -> None:
+        """Insert an edge, replacing an existing one with the same endpoints
+        and type (as beaver's link does)."""
+        self.remove(source, target, type)
+        seq = next(self._seq)
+        key = (_RANK[type], _UNORDERED if order is None else order, seq)
+        insort(self._out.setdefault(source, []), (key, type, target, order))
+        insort(self._in.setdefault(target, []), (key, type, source, order))
+
+    def remove(self, source: str, target: str, type: EdgeType) -> None:
+        for table, a, b in ((self._out, source, target), (self._in, target, source)):
+            entries = table.get(a)
+            if entries:
+                entries[:] = [e for e in entries if not (e[1] is type and e[2] == b)]
+
+    def load(self, edges: Iterable[tuple[str, str, EdgeType, int | None]]) -> None:
+        for source, target, type, order in edges:
+            self.add(source, target, type, order)
+
+    def out(self, slug: str, type: EdgeType | None = None
+            ) -> list[tuple[EdgeType, str, int | None]]:
+        """Outgoing edges of `slug` as (type, target, order)."""
+        return [(t, other, order) for _, t, other, order in self._out.get(slug, ())
+                if type is None or t is type]
+
+    def into(self, slug: str, type: EdgeType | None = None
+             ) -> list[tuple[EdgeType, str, int | None]]:
+        """Incoming edges of `slug` as (type, source, order)."""
+        return [(t, other, order) for _, t, other, order in self._in.get(slug, ())
+                if type is None or t is type]
+
+
+def spread(adjacency: Adjacency, seeds: Mapping[str, float],
+           weights: Mapping[EdgeType, float] | None = None, depth: int = 2,
+           decay: float = 0.5, fan_out: int | None = None, direction: str = "out",
+           allow: Callable[[str], bool] | None = None,
+           threshold: float = 0.0) -> dict[str, float]:
+    """Spreading activation from `seeds` (slug -> initial activation).
+
+    Runs level-synchronously: each of the `depth` rounds pushes the whole
+    frontier's activation across its edges at once, scaled by the edge type's
+    weight (types missing from `weights` are not followed; None follows all at
+    1.0) and by `decay`. Each node passes activation along at most `fan_out`
+    edges, heaviest types first. Nodes failing `allow` neither receive nor
+    pass activation; contributions below `threshold` are dropped. Returns the
+    accumulated activation of every reached node, seeds included."""
+    if direction not in ("out", "in", "both"):
+        raise ValueError(f"direction must be 'out', 'in' or 'both', not {direction!r}")
+    w = dict(weights) if weights is not None else dict.fromkeys(EdgeType, 1.0)
+    total: dict[str, float] = {s: a for s, a in seeds.items() if allow is None or allow(s)}
+    frontier = dict(total)
+    for _ in range(depth):
+        reached: dict[str, float] = {}
+        for node, activation in frontier.items():
+            edges = []
+            if direction in ("out", "both"):
+                edges += adjacency.out(node)
+            if direction in ("in", "both"):
+                edges += adjacency.into(node)
+            edges = [(w[t], other) for t, other, _ in edges if w.get(t)]
+            edges.sort(key=lambda e: -e[0])                    # stable: keeps order
+            for weight, other in edges[:fan_out]:
+                pushed = activation * weight * decay
+                if pushed > threshold and (allow is None or allow(other)):
+                    reached[other] = reached.get(other, 0.0) + pushed
+        if not reached:
+            break
+        for node, activation in reached.items():
+            total[node] = total.get(node, 0.0) + activation
+        frontier = reached
+    return total
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+SCHEMES = ("flat", "sharded")
+
+
+def shard(slug: str) -> str:
+    """The subdirectory of `slug` in the sharded layout: two hex digits of its
+    hash, spreading notes evenly over 256 directories."""
+    return hashlib.blake2b(slug.encode("utf-8"), digest_size=1).hexdigest()
+
+
+class Layout:
+    """Where note files live under the store folder.
+
+    `flat` keeps every note at `<folder>/<slug>.md`; `sharded` at
+    `<folder>/<shard>/<slug>.md` (see `shard`), so no directory grows past a
+    few thousand entries. File names are the slug either way.
+
+    While a store migrates between schemes, `previous` is the layout being
+    left: reads fall back to it and listings cover both until every file
+    has been adopted."""
+
+    def __init__(self, folder: str | Path, scheme: str = "flat",
+                 previous: Layout | None = None):
+        if scheme not in SCHEMES:
+            raise ValueError(f"layout must be one of {SCHEMES}, not {scheme!r}")
+        self.folder = Path(folder)
+        self.scheme = scheme
+        self.previous = previous
+        self._shards: set[str] = set()           # shard directories known to exist
+
+    def __repr__(self) -> str:
+        return f"Layout({str(self.folder)!r}, {self.scheme!r})"
+
+    def path(self, slug: str) -> Path:
+        if self.scheme == "flat":
+            return self.folder / f"{slug}.md"
+        return self.folder / shard(slug) / f"{slug}.md"
+
+    def candidates(self, slug: str) -> list[Path]:
+        """Where the file of `slug` may be, in order of preference."""
+        if self.previous is None:
+            return [self.path(slug)]
+        return [self.path(slug), *self.previous.candidates(slug)]
+
+    def stat(self, slug: str) -> tuple[Path, os.stat_result] | None:
+        """The file of `slug` and its stat, or None if it has none."""
+        for path in self.candidates(slug):
+            try:
+                return path, path.stat()
+            except FileNotFoundError:
+                pass
+        return None
+
+    def writable(self, slug: str) -> Path:
+        """`path(slug)`, creating its shard directory the first time."""
+        path = self.path(slug)
+        if self.scheme != "flat" and path.parent.name not in self._shards:
+            path.parent.mkdir(exist_ok=True)
+            self._shards.add(path.parent.name)
+        return path
+
+    def slugs(self) -> list[str]:
+        pattern = "*.md" if self.scheme == "flat" else "??/*.md"
+        out = {path.stem for path in self.folder.glob(pattern)}
+        if self.previous is not None:
+            out.update(self.previous.slugs())
+        return sorted(out)
+
+    def adopt(self, slugs: list[str]) -> int:
+        """Move the files of `slugs` from `previous` into this layout. A file
+        already present here was written since the migration began and wins
+        over the old copy. Returns the number of files moved."""
+        moved = 0
+        for slug in slugs:
+            source, target = self.previous.path(slug), self.writable(slug)
+            if source == target:
+                continue
+            try:
+                os.link(source, target)        # never clobbers a newer write
+                moved += 1
+            except FileExistsError:
+                pass
+            except FileNotFoundError:
+                continue
+            source.unlink(missing_ok=True)
+        return moved
+
+    def prune(self) -> None:
+        """Remove shard directories left empty (after migrating to `flat`)."""
+        for directory in self.folder.glob("??"):
+            if directory.is_dir() and not any(directory.iterdir()):
+                directory.rmdir()
@@ -1,17 +1,45 @@
 from __future__ import annotations
 
-import frontmatter
+import re
+from itertools import chain
+from pathlib import Path
+
+import yaml
 
 from leto.model import (
     Edge, ExperiencePayload, FactPayload, Kind, Note, ProcedurePayload, Settlement,
 )
 
+try:
+    from yaml import CSafeDumper as _Dumper, CSafeLoader as _Loader
+except ImportError:                                       # PyYAML built without libyaml
+    from yaml import SafeDumper as _Dumper, SafeLoader as _Loader
+
 _PAYLOAD_FOR = {
     Kind.FACT: FactPayload,
     Kind.PROCEDURE: ProcedurePayload,
     Kind.EXPERIENCE: ExperiencePayload,
 }
 
+# Notes are `---`-delimited YAML frontmatter followed by a rendered body, as
+# python-frontmatter writes them: keys sorted, block style, 80-column folding.
+# The codec below reads and writes exactly that subset of YAML by hand and
+# hands anything else (a hand-edited file, an unusual string) to PyYAML.
+
+_BOUNDARY = re.compile(r"^-{3,}\s*$", re.MULTILINE)
+_WIDTH = 80                                     # PyYAML's default best_width
+_KEY_LINE = re.compile(r"([a-z_]+):(?: (.*))?$")
+_DECIMAL = re.compile(r"-?(?:0|[1-9][0-9]*)$")
+_PRINTABLE = re.compile(
+    "[\x20-\x7e\xa0-\ud7ff\ue000-\ufefe\uff00-\ufffd]*")
+_INDICATORS = "#,[]{}&*!|>'\"%@`"
+_RESOLVERS = _Loader.yaml_implicit_resolvers
+_NULL, _INT = "tag:yaml.org,2002:null", "tag:yaml.org,2002:int"
+
+
+class _Fallback(Exception):
+    """The fast codec met YAML outside the subset it handles."""
+
 
 def _render_body(note: Note) -> str:
     """A human-readable view of the note. Not parsed back — frontmatter is
@@ -32,39 +60,254 @@ def _render_body(note: Note) -> str:
     return "\n".join(lines).strip()
 
 
+def _metadata(note: Note) -> dict:
+    return {
+        "kind": note.kind.value,
+        "title": note.title,
+        "settlement": note.settlement.value,
+        "sources": list(note.sources),
+        "aliases": list(note.aliases),
+        "valid_from": note.valid_from,
+        "valid_to": note.valid_to,
+        "recorded_at": note.recorded_at,
+        "promoted_from": list(note.promoted_from),
+        "payload": note.payload.model_dump(mode="json"),
+        "edges": [e.model_dump(mode="json") for e in note.edges],
+    }
+
+
 def note_to_markdown(note: Note) -> str:
-    post = frontmatter.Post(
-        _render_body(note),
-        kind=note.kind.value,
-        title=note.title,
-        settlement=note.settlement.value,
-        sources=list(note.sources),
-        aliases=list(note.aliases),
-        valid_from=note.valid_from,
-        valid_to=note.valid_to,
-        recorded_at=note.recorded_at,
-        promoted_from=list(note.promoted_from),
-        payload=note.payload.model_dump(mode="json"),
-        edges=[e.model_dump(mode="json") for e in note.edges],
-    )
-    return frontmatter.dumps(post)
+    metadata = _metadata(note)
+    try:
+        fm = _dump_fast(metadata)
+    except _Fallback:
+        fm = yaml.dump(metadata, Dumper=_Dumper, default_flow_style=False,
+                       allow_unicode=True).strip()
+    return f"---\n{fm}\n---\n\n{_render_body(note)}"
 
 
 def note_from_markdown(text: str, slug: str) -> Note:
-    post = frontmatter.loads(text)
-    kind = Kind(post["kind"])
-    payload = _PAYLOAD_FOR[kind](**(post.get("payload") or {}))
+    return _note(_load(_frontmatter(text)), slug)
+
+
+def note_from_file(path: str | Path, slug: str) -> Note:
+    """Parse a note file, reading no further than its closing delimiter."""
+    lines, line = [], ""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                break
+        if not _BOUNDARY.match(line.lstrip()):
+            raise ValueError(f"{path} has no frontmatter")
+        for line in f:
+            if _BOUNDARY.match(line):
+                return _note(_load("".join(lines)), slug)
+            lines.append(line)
+    raise ValueError(f"{path} has no closing frontmatter delimiter")
+
+
+def _frontmatter(text: str) -> str:
+    """The YAML between the delimiters; the body is never sliced out."""
+    text = text.lstrip()
+    start = _BOUNDARY.match(text)
+    end = start and _BOUNDARY.search(text, start.end())
+    if not end:
+        raise ValueError("note has no frontmatter")
+    return text[start.end():end.start()]
+
+
+def _note(data: dict, slug: str) -> Note:
+    kind = Kind(data["kind"])
+    payload = _PAYLOAD_FOR[kind](**(data.get("payload") or {}))
     return Note(
         slug=slug,
         kind=kind,
-        title=post["title"],
-        settlement=Settlement(post.get("settlement", "fleeting")),
-        sources=list(post.get("sources", []) or []),
-        aliases=list(post.get("aliases", []) or []),
-        valid_from=post.get("valid_from"),
-        valid_to=post.get("valid_to"),
-        recorded_at=post.get("recorded_at"),
-        promoted_from=list(post.get("promoted_from", []) or []),
-        edges=[Edge(**e) for e in (post.get("edges", []) or [])],
+        title=data["title"],
+        settlement=Settlement(data.get("settlement", "fleeting")),
+        sources=list(data.get("sources", []) or []),
+        aliases=list(data.get("aliases", []) or []),
+        valid_from=data.get("valid_from"),
+        valid_to=data.get("valid_to"),
+        recorded_at=data.get("recorded_at"),
+        promoted_from=list(data.get("promoted_from", []) or []),
+        edges=[Edge(**e) for e in (data.get("edges", []) or [])],
         payload=payload,
     )
+
+
+# --- reading -----------------------------------------------------------------
+
+def _load(fm: str) -> dict:
+    try:
+        return _load_fast(fm)
+    except _Fallback:
+        data = yaml.load(fm, Loader=_Loader)
+        return data if isinstance(data, dict) else {}
+
+
+def _load_fast(fm: str) -> dict:
+    """Parse the block-style YAML the dumper writes for a note: top-level
+    scalars, flat mappings, and sequences of scalars or flat mappings, with
+    plain or single-quoted scalars folded over several lines."""
+    lines = fm.strip("\n").split("\n")
+    n, i = len(lines), 0
+
+    def folded(first: str, owner: int) -> object:
+        # a scalar continues on every following line indented past its key
+        nonlocal i
+        parts = [first]
+        while i < n and lines[i][:owner + 1].isspace():
+            parts.append(lines[i].lstrip(" "))
+            i += 1
+        return _scalar(parts)
+
+    def mapping(indent: int, first: re.Match | None = None) -> dict:
+        nonlocal i
+        out = {}
+        m = first
+        while True:
+            if m is not None:
+                if m.group(2) is None:
+                    raise _Fallback
+                out[m.group(1)] = folded(m.group(2), indent)
+            line = lines[i] if i < n else ""
+            if not line.startswith(" " * indent) or line[indent:indent + 1] in ("", " "):
+                return out
+            m = _KEY_LINE.match(lines[i], indent)
+            if m is None:
+                raise _Fallback
+            i += 1
+
+    data = {}
+    while i < n:
+        m = _KEY_LINE.match(lines[i])
+        if m is None:
+            raise _Fallback
+        i += 1
+        key, rest = m.groups()
+        if rest is not None:
+            data[key] = folded(rest, 0)
+        elif i < n and lines[i].startswith("- "):
+            items = []
+            while i < n and lines[i].startswith("- "):
+                body, i = lines[i][2:], i + 1
+                item = _KEY_LINE.match(body)
+                items.append(mapping(2, item) if item else folded(body, 0))
+            data[key] = items
+        elif i < n and lines[i].startswith("  "):
+            data[key] = mapping(2)
+        else:
+            data[key] = None
+    return data
+
+
+def _scalar(parts: list[str]) -> object:
+    if any(p != p.rstrip() or not p for p in parts):
+        raise _Fallback
+    text = " ".join(parts)
+    if text[0] == "'":
+        m = re.fullmatch(r"'((?:[^']|'')*)'", text)
+        if m is None:
+            raise _Fallback
+        return m.group(1).replace("''", "'")
+    if len(parts) == 1 and text in ("[]", "{}"):
+        return [] if text == "[]" else {}
+    if (text[0] in _INDICATORS or (text[0] in "?:-" and text[1:2] in ("", " "))
+            or any(": " in p or p.endswith(":") or " #" in p or p[0] == "#"
+                   for p in parts)):
+        raise _Fallback
+    tag = _implicit_tag(text)
+    if tag is None:
+        return text
+    if tag == _NULL:
+        return None
+    if tag == _INT and _DECIMAL.match(text):
+        return int(text)
+    raise _Fallback
+
+
+def _implicit_tag(text: str) -> str | None:
+    """The tag a plain scalar resolves to, None for a string."""
+    for tag, regexp in chain(_RESOLVERS.get(text[:1], ()), _RESOLVERS.get(None, ())):
+        if regexp.match(text):
+            return tag
+    return None
+
+
+# --- writing -----------------------------------------------------------------
+
+def _dump_fast(metadata: dict) -> str:
+    """`yaml.dump(metadata, default_flow_style=False, allow_unicode=True)`,
+    stripped, for the shapes `_metadata` produces."""
+    out = []
+    for key in sorted(metadata):
+        value = metadata[key]
+        if isinstance(value, dict):
+            out.append(f"{key}: {{}}" if not value else f"{key}:")
+            _dump_mapping(value, 2, "  ", out)
+        elif isinstance(value, list):
+            if not value:
+                out.append(f"{key}: []")
+                continue
+            out.append(f"{key}:")
+            for item in value:
+                if isinstance(item, dict) and item:
+                    _dump_mapping(item, 2, "- ", out)
+                elif isinstance(item, (dict, list)):
+                    raise _Fallback
+                else:
+                    out.append("- " + _emit(item, 2, 2))
+        else:
+            out.append(f"{key}: " + _emit(value, len(key) + 2, 2))
+    return "\n".join(out)
+
+
+def _dump_mapping(mapping: dict, indent: int, first: str, out: list[str]) -> None:
+    prefix = first
+    for key in sorted(mapping):
+        value = mapping[key]
+        if isinstance(value, (dict, list)):
+            raise _Fallback
+        out.append(f"{prefix}{key}: " + _emit(value, indent + len(key) + 2, indent + 2))
+        prefix = " " * indent
+
+
+def _emit(value: object, column: int, indent: int) -> str:
+    """One scalar as the emitter writes it from `column`, folding long
+    strings onto lines indented by `indent`."""
+    if value is None:
+        return "null"
+    if type(value) is int:
+        return str(value)
+    if type(value) is not str or not _PRINTABLE.fullmatch(value):
+        raise _Fallback
+    if _plain(value):
+        return _fold(value, column, indent, quoted=False)
+    return "'" + _fold(value, column + 1, indent, quoted=True) + "'"
+
+
+def _plain(text: str) -> bool:
+    return bool(text) and not (
+        text[0] == " " or text[-1] == " " or text.startswith(("---", "..."))
+        or text[0] in _INDICATORS or (text[0] in "?:-" and text[1:2] in ("", " "))
+        or ": " in text or text[-1] == ":" or " #" in text
+        or _implicit_tag(text) is not None)
+
+
+def _fold(text: str, column: int, indent: int, quoted: bool) -> str:
+    # the emitter breaks a line at a lone space once it is past the width
+    if column + len(text) <= _WIDTH and not (quoted and "'" in text):
+        return text
+    out, last = [], len(text) - 1
+    for i, ch in enumerate(text):
+        if (ch == " " and column > _WIDTH and 0 < i < last
+                and text[i - 1] != " " and text[i + 1] != " "):
+            out.append("\n" + " " * indent)
+            column = indent
+        elif ch == "'" and quoted:
+            out.append("''")
+            column += 2
+        else:
+            out.append(ch)
+            column += 1
+    return "".join(out)
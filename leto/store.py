@@ -1,15 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from collections.abc import AsyncIterator, Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 
-from beaver import AsyncBeaverDB, Document
+from beaver import AsyncBeaverDB, Document, q
 from pydantic import BaseModel
 
-from leto.markdown import note_from_markdown, note_to_markdown
+from leto.cache import NoteCache, Stamp
+from leto.embed import Embedder, MicroBatcher, key_digest
+from leto.graph import Adjacency, spread
+from leto.layout import Layout
+from leto.markdown import note_from_file, note_from_markdown, note_to_markdown
 from leto.model import (
-    Edge, EdgeType, EpistemicState, Note, ORDERED_EDGES, edge_allowed, retrieval_key,
+    Edge, EdgeType, EpistemicState, Kind, Note, ORDERED_EDGES, Settlement, edge_allowed,
+    retrieval_key,
 )
+from leto.temporal import Span, TemporalIndex
+
+
+_IO_CHUNK = 32          # note files per I/O pool task
 
 
 def NOW() -> str:
@@ -17,87 +34,656 @@ def NOW() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+@dataclass
+class SyncReport:
+    """Slugs whose markdown `NoteStore.sync` found new, edited or gone."""
+
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def _manifest_entry(st: os.stat_result, data: bytes) -> dict:
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+            "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def _read_notes(layout: Layout, slugs: list[str], known: list[Stamp | None]
+                ) -> list[tuple[Stamp, Note | None] | None]:
+    """Stat (and, unless the stamp matches `known`, parse) note files. Runs on
+    the store's I/O pool; None marks a missing file."""
+    out = []
+    for slug, stamp in zip(slugs, known):
+        result = None
+        for _ in range(2):              # a layout migration may move the file away
+            found = layout.stat(slug)
+            if found is None:
+                break
+            path, st = found
+            fresh = (st.st_mtime_ns, st.st_size)
+            try:
+                result = (fresh, None if fresh == stamp else note_from_file(path, slug))
+                break
+            except FileNotFoundError:
+                continue
+        out.append(result)
+    return out
+
+
+def _write_notes(layout: Layout, notes: list[Note]) -> list[dict]:
+    """Write note files and return their manifest entries. Runs on the I/O pool."""
+    out = []
+    for note in notes:
+        path = layout.writable(note.slug)
+        data = note_to_markdown(note).encode("utf-8")
+        path.write_bytes(data)
+        out.append(_manifest_entry(path.stat(), data))
+    return out
+
+
+def _tag(kind: Kind, settlement: Settlement) -> int:
+    """The numpy vector backend's per-row filter tag for (kind, settlement)."""
+    return list(Kind).index(Kind(kind)) * 8 + list(Settlement).index(Settlement(settlement))
+
+
+async def _none() -> list:
+    return []
+
+
 class NoteDoc(BaseModel):
     slug: str
     key: str          # the retrieval key (FTS target)
     kind: str
+    settlement: str = Settlement.FLEETING.value
 
 
 class NoteStore:
-    def __init__(self, folder: str | Path, db_path: str | Path):
+    def __init__(self, folder: str | Path, db_path: str | Path,
+                 cache_bytes: int = 64 * 1024 * 1024, vector_backend: str = "beaver",
+                 quantize: str | None = None, embedder: Embedder | None = None,
+                 io_workers: int = 8):
+        if vector_backend not in ("beaver", "numpy"):
+            raise ValueError(
+                f"vector_backend must be 'beaver' or 'numpy', not {vector_backend!r}")
         self.folder = Path(folder)
         self.folder.mkdir(parents=True, exist_ok=True)
+        self.layout = Layout(self.folder)
         self._db_path = str(db_path)
         self._db: AsyncBeaverDB | None = None
+        self.cache = NoteCache(cache_bytes)
+        self.embedder = embedder
+        self._batcher = MicroBatcher(embedder) if embedder is not None else None
+        self._io_workers = io_workers
+        self._io = ThreadPoolExecutor(io_workers, thread_name_prefix="leto-io")
+        self._matrix = None
+        if vector_backend == "numpy":
+            from leto.vectors import MatrixIndex
+            self._matrix = MatrixIndex(Path(self._db_path + ".d") / "vectors", quantize)
 
     @classmethod
-    async def open(cls, folder: str | Path, db_path: str | Path) -> "NoteStore":
-        self = cls(folder, db_path)
+    async def open(cls, folder: str | Path, db_path: str | Path,
+                   cache_bytes: int = 64 * 1024 * 1024, vector_backend: str = "beaver",
+                   quantize: str | None = None, embedder: Embedder | None = None,
+                   sync: bool = False, io_workers: int = 8,
+                   layout: str | None = None) -> "NoteStore":
+        """Open (or create) a store. `vector_backend="numpy"` keeps embeddings
+        in a memory-mapped float32 matrix next to the database (optionally
+        with an int8/float16 `quantize`d copy for the coarse pass) instead of
+        beaver's vector collection. With an `embedder`, notes put without an
+        explicit embedding are embedded from their retrieval key. `sync=True`
+        reconciles the indexes with the folder before returning (see `sync`).
+        Note files are read and written on a pool of `io_workers` threads, so
+        disk latency never blocks the event loop. `layout` picks how a new
+        store arranges its files (see `leto.layout.Layout`); an existing store
+        keeps the layout recorded in its metadata (see `migrate_layout`)."""
+        self = cls(folder, db_path, cache_bytes, vector_backend, quantize, embedder,
+                   io_workers)
         self._db = AsyncBeaverDB(self._db_path)
         await self._db.connect()
         self._docs = self._db.docs("notes", model=NoteDoc)
         self._vectors = self._db.vectors("embeddings")
         self._graph = self._db.graph("edges")
         self._aliases = self._db.dict("aliases")
+        self._embeddings = self._db.dict("embedding_cache")
+        self._spans = self._db.dict("temporal")
+        self._manifest = self._db.dict("manifest")
+        self._meta = self._db.dict("meta")
+        await self._load_layout(layout)
+        self.temporal = TemporalIndex()
+        await self._load_temporal()
+        self.adjacency = Adjacency()
+        await self._load_adjacency()
+        if sync:
+            await self.sync()
         return self
 
+    async def _load_layout(self, scheme: str | None) -> None:
+        recorded = await self._meta.fetch("layout", None)
+        if recorded is None:
+            # stores predating recorded layouts (or with files put there by
+            # hand) are flat
+            flat = await self._io_call(Layout(self.folder).slugs)
+            recorded = {"scheme": "flat" if flat else scheme or "flat"}
+            await self._meta.set("layout", recorded)
+        if scheme is not None and scheme != recorded["scheme"]:
+            raise ValueError(
+                f"the store at {self.folder} uses the {recorded['scheme']!r} layout; "
+                f"open it without `layout` and call migrate_layout({scheme!r})")
+        previous = recorded.get("from")
+        self.layout = Layout(self.folder, recorded["scheme"],
+                             Layout(self.folder, previous) if previous else None)
+
+    async def migrate_layout(self, scheme: str) -> int:
+        """Rearrange the note files into the `scheme` layout in place, while
+        the store keeps serving: reads find a note at its old or new path and
+        writes go to the new one. Files are moved by hard link + unlink, so
+        their stamps (and the cache and sync manifest) stay valid. An
+        interrupted migration is resumed by the next call, and by reopening
+        the store. Returns the number of files moved."""
+        if self.layout.previous is not None and self.layout.scheme != scheme:
+            raise ValueError(
+                f"a migration to {self.layout.scheme!r} is unfinished; "
+                f"run migrate_layout({self.layout.scheme!r}) first")
+        if self.layout.previous is None:
+            if self.layout.scheme == scheme:
+                return 0
+            self.layout = Layout(self.folder, scheme, Layout(self.folder, self.layout.scheme))
+        layout, old = self.layout, self.layout.previous
+        await self._meta.set("layout", {"scheme": scheme, "from": old.scheme})
+        slugs = await self._io_call(old.slugs)
+        moved = 0
+        for i in range(0, len(slugs), _IO_CHUNK):
+            moved += await self._io_call(layout.adopt, slugs[i:i + _IO_CHUNK])
+        if old.scheme != "flat":
+            await self._io_call(old.prune)
+        await self._meta.set("layout", {"scheme": scheme})
+        layout.previous = None
+        return moved
+
+    async def _load_adjacency(self) -> None:
+        # beaver's graph only iterates per node; read its edge table in one pass
+        cursor = await self._db.connection.execute(
+            "SELECT source_item_id, target_item_id, label, metadata "
+            "FROM __beaver_edges__ WHERE collection = ? ORDER BY rowid", ("edges",))
+        self.adjacency.load([
+            (row["source_item_id"], row["target_item_id"], EdgeType(row["label"]),
+             json.loads(row["metadata"] or "{}").get("order"))
+            async for row in cursor])
+
+    async def _load_temporal(self) -> None:
+        """Load the persisted temporal index, building it from the markdown
+        folder the first time a store without one is opened."""
+        self.temporal.load([(slug, Span.from_dict(data))
+                            async for slug, data in self._spans.items()])
+        if len(self.temporal) or not await self._io_call(self._slugs_on_disk):
+            return
+        notes = await self.all_notes()
+        for note in notes:
+            self.temporal.set(note.slug, Span.of(note))
+        for note in notes:
+            for e in note.edges:
+                if e.type is EdgeType.SUPERSEDES:
+                    self.temporal.supersede(note.slug, e.target)
+        await self._save_spans(n.slug for n in notes)
+
+    async def _save_spans(self, slugs: Iterable[str]) -> None:
+        async with self._spans.batched() as batch:
+            for slug in slugs:
+                batch.set(slug, self.temporal.span(slug).to_dict())
+
     async def put(self, note: Note, embedding: list[float] | None = None) -> Note:
-        if note.recorded_at is None:
-            note.recorded_at = NOW()
-        if note.valid_from is None:
-            note.valid_from = note.recorded_at
-        (self.folder / f"{note.slug}.md").write_text(
-            note_to_markdown(note), encoding="utf-8")
-        await self._docs.index(document=Document(
-            id=note.slug,
-            body=NoteDoc(slug=note.slug, key=retrieval_key(note),
-                         kind=note.kind.value)))
-        if embedding is not None:
-            await self._vectors.set(note.slug, embedding)
+        await self.put_many([note], [embedding])
         return note
 
+    async def put_many(self, notes: Iterable[Note],
+                       embeddings: Iterable[list[float] | None] | None = None,
+                       ) -> list[Note]:
+        """Bulk `put`: one markdown write per note, then all FTS documents and
+        vectors pushed to beaver in a single transaction."""
+        notes = list(notes)
+        vectors = list(embeddings) if embeddings is not None else [None] * len(notes)
+        if len(vectors) != len(notes):
+            raise ValueError(
+                f"got {len(vectors)} embeddings for {len(notes)} notes")
+        if self.embedder is not None:
+            todo = [i for i, v in enumerate(vectors) if v is None]
+            for i, vector in zip(todo, await self._embed([notes[i] for i in todo])):
+                vectors[i] = vector
+        for note in notes:
+            if note.recorded_at is None:
+                note.recorded_at = NOW()
+            if note.valid_from is None:
+                note.valid_from = note.recorded_at
+        stamps = []
+        for i in range(0, len(notes), _IO_CHUNK):
+            chunk = notes[i:i + _IO_CHUNK]
+            stamps += await self._io_call(_write_notes, self.layout, chunk)
+        for note, entry in zip(notes, stamps):
+            self.cache.put(note.slug, (entry["mtime_ns"], entry["size"]), note)
+        await self._index(notes, vectors, stamps)
+        return notes
+
+    async def _index(self, notes: list[Note], vectors: list[list[float] | None],
+                     stamps: list[dict]) -> None:
+        """Bring every beaver index in line with already-written notes, in one
+        transaction: FTS documents, vectors, temporal spans, manifest."""
+        changed: dict[str, None] = {}
+        for note in notes:
+            changed.update(dict.fromkeys(self.temporal.set(note.slug, Span.of(note))))
+        async with self._db.transaction():
+            async with self._docs.batched() as batch:
+                for note in notes:
+                    batch.index(document=self._doc(note))
+            for note, vector in zip(notes, vectors):
+                if vector is None:
+                    continue
+                if self._matrix is not None:
+                    self._matrix.set(note.slug, vector, _tag(note.kind, note.settlement))
+                else:
+                    await self._vectors.set(note.slug, vector, metadata={
+                        "kind": note.kind.value, "settlement": note.settlement.value})
+            await self._save_spans(changed)
+            async with self._manifest.batched() as batch:
+                for note, stamp in zip(notes, stamps):
+                    batch.set(note.slug, stamp)
+
+    async def _embed(self, notes: list[Note]) -> list[list[float]]:
+        """Embeddings of the notes' retrieval keys, from the content-addressed
+        cache when the key was embedded before (edge, settlement or source
+        edits never change it), else through the micro-batcher."""
+        texts = [retrieval_key(n) for n in notes]
+        digests = [key_digest(self.embedder.model_id, t) for t in texts]
+        vectors = [await self._embeddings.fetch(d, None) for d in digests]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            fresh = await asyncio.gather(*(self._batcher.embed(texts[i]) for i in missing))
+            async with self._embeddings.batched() as batch:
+                for i, vector in zip(missing, fresh):
+                    vectors[i] = vector
+                    batch.set(digests[i], vector)
+        return vectors
+
+    def _slugs_on_disk(self) -> list[str]:
+        return self.layout.slugs()
+
+    async def _io_call(self, fn, *args):
+        """Run blocking file I/O on the store's thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._io, fn, *args)
+
+    @staticmethod
+    def _doc(note: Note) -> Document:
+        return Document(id=note.slug, body=NoteDoc(
+            slug=note.slug, key=retrieval_key(note), kind=note.kind.value,
+            settlement=note.settlement.value))
+
+    async def sync(self, workers: int | None = None,
+                   parallel_threshold: int = 256) -> SyncReport:
+        """Reconcile the beaver indexes with the markdown folder after notes
+        were added, edited or deleted behind the store's back.
+
+        Files whose mtime/size match the manifest are skipped without being
+        read; the rest are hashed and only those whose content changed are
+        re-parsed (across a process pool of `workers` when there are at least
+        `parallel_threshold` of them) and re-indexed — FTS, temporal spans,
+        graph edges from each note's `edges`, and vectors when the store has
+        an embedder. Index entries of deleted files are dropped."""
+        manifest = {slug: entry async for slug, entry in self._manifest.items()}
+        files, dirty, touched = await self._io_call(self._scan, manifest)
+        removed = sorted(set(manifest) - set(files))
+        report = SyncReport(added=sorted(s for s, _, _ in dirty if s not in manifest),
+                            changed=sorted(s for s, _, _ in dirty if s in manifest),
+                            removed=removed)
+
+        texts = [data.decode("utf-8") for _, data, _ in dirty]
+        slugs = [slug for slug, _, _ in dirty]
+        if len(dirty) >= parallel_threshold:
+            # the store runs threads (aiosqlite, to_thread): don't fork it
+            context = multiprocessing.get_context("forkserver")
+            with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                notes = await asyncio.to_thread(
+                    lambda: list(pool.map(note_from_markdown, texts, slugs, chunksize=64)))
+        else:
+            notes = [note_from_markdown(t, s) for t, s in zip(texts, slugs)]
+        for note, (_, _, entry) in zip(notes, dirty):
+            self.cache.discard(note.slug)
+        vectors = (await self._embed(notes) if self.embedder is not None
+                   else [None] * len(notes))
+        if notes:
+            await self._index(notes, vectors, [entry for _, _, entry in dirty])
+        await self._relink(notes, files)
+        await self._drop(removed)
+        async with self._manifest.batched() as batch:
+            for slug, entry in touched.items():
+                batch.set(slug, entry)
+        return report
+
+    def _scan(self, manifest: dict[str, dict]
+              ) -> tuple[set[str], list[tuple[str, bytes, dict]], dict[str, dict]]:
+        """The slugs on disk, the files whose content differs from `manifest`,
+        and the fresh manifest entries of files only touched. Runs on the I/O pool."""
+        files = set(self._slugs_on_disk())
+        dirty, touched = [], {}
+        for slug in sorted(files):
+            found = self.layout.stat(slug)
+            if found is None:                       # deleted while scanning
+                files.discard(slug)
+                continue
+            path, st = found
+            known = manifest.get(slug)
+            if known and (known["mtime_ns"], known["size"]) == (st.st_mtime_ns, st.st_size):
+                continue
+            data = path.read_bytes()
+            entry = _manifest_entry(st, data)
+            if known and known["sha256"] == entry["sha256"]:
+                touched[slug] = entry
+            else:
+                dirty.append((slug, data, entry))
+        return files, dirty, touched
+
+    async def _relink(self, notes: list[Note], files: set[str]) -> None:
+        """Make the graph's outgoing edges of `notes` match their `edges`."""
+        unlink, link = [], []
+        for note in notes:
+            want = {(e.type, e.target): (e.order if e.type in ORDERED_EDGES else None)
+                    for e in note.edges if e.target in files and e.target != note.slug}
+            have = {(t, target): order for t, target, order in self.adjacency.out(note.slug)}
+            unlink += [(note.slug, target, t) for (t, target) in have.keys() - want.keys()]
+            link += [(note.slug, target, t, order) for (t, target), order in want.items()
+                     if (t, target) not in have or have[(t, target)] != order]
+        changed: dict[str, None] = {}
+        for source, target, t in unlink:
+            self.adjacency.remove(source, target, t)
+            if t is EdgeType.SUPERSEDES and self.temporal.unsupersede(source, target):
+                changed[target] = None
+        for source, target, t, order in link:
+            self.adjacency.add(source, target, t, order)
+            if t is EdgeType.SUPERSEDES and self.temporal.supersede(source, target):
+                changed[target] = None
+        async with self._db.transaction():
+            for source, target, t in unlink:
+                await self._graph.unlink(source, target, t.value)
+            for source, target, t, order in link:
+                await self._graph.link(source, target, label=t.value,
+                                       metadata={"order": order})
+            await self._save_spans(changed)
+
+    async def _drop(self, slugs: list[str]) -> None:
+        """Remove every index entry of notes whose markdown is gone."""
+        if not slugs:
+            return
+        changed: dict[str, None] = {}
+        edges = []
+        for slug in slugs:
+            self.cache.discard(slug)
+            changed.update(dict.fromkeys(self.temporal.discard(slug)))
+            edges += [(slug, target, t) for t, target, _ in self.adjacency.out(slug)]
+            edges += [(source, slug, t) for t, source, _ in self.adjacency.into(slug)]
+        for source, target, t in edges:
+            self.adjacency.remove(source, target, t)
+        changed = {s: None for s in changed if s in self.temporal}
+        async with self._db.transaction():
+            for slug in slugs:
+                await self._docs.drop(slug)
+                if self._matrix is not None:
+                    self._matrix.delete(slug)
+                else:
+                    await self._vectors.delete(slug)
+                await self._spans.pop(slug)
+                await self._manifest.pop(slug)
+            for source, target, t in edges:
+                await self._graph.unlink(source, target, t.value)
+            await self._save_spans(changed)
+
     async def get(self, slug: str) -> Note | None:
-        path = self.folder / f"{slug}.md"
-        if path.exists():
-            return note_from_markdown(path.read_text(encoding="utf-8"), slug)
-        canonical = await self._aliases.fetch(slug, None)
-        if canonical and canonical != slug:
-            return await self.get(canonical)
-        return None
+        return (await self.get_many([slug]))[0]
 
-    async def all_notes(self) -> list[Note]:
-        out: list[Note] = []
-        for path in sorted(self.folder.glob("*.md")):
-            note = await self.get(path.stem)
-            if note is not None:
-                out.append(note)
+    async def get_many(self, slugs: Iterable[str],
+                       concurrency: int | None = None) -> list[Note | None]:
+        """`get` for many slugs: the notes in order, None for missing ones.
+        Files are stat'ed and (on a cache miss) parsed in chunks on the I/O
+        pool, at most `concurrency` chunks at a time (default: one per I/O
+        thread). Aliases of merged notes resolve to their canonical note."""
+        slugs = list(slugs)
+        unique = list(dict.fromkeys(slugs))
+        limit = asyncio.Semaphore(concurrency or self._io_workers)
+
+        async def read(chunk: list[str]):
+            async with limit:
+                return await self._io_call(_read_notes, self.layout, chunk,
+                                           [self.cache.stamp(s) for s in chunk])
+
+        chunks = [unique[i:i + _IO_CHUNK] for i in range(0, len(unique), _IO_CHUNK)]
+        found: dict[str, Note] = {}
+        missing: list[str] = []
+        stale: list[str] = []
+        for chunk, results in zip(chunks, await asyncio.gather(*map(read, chunks))):
+            for slug, result in zip(chunk, results):
+                if result is None:
+                    self.cache.discard(slug)
+                    missing.append(slug)
+                    continue
+                stamp, note = result
+                if note is None:
+                    note = self.cache.get(slug, stamp)
+                    if note is None:                    # evicted meanwhile
+                        stale.append(slug)
+                        continue
+                else:
+                    self.cache.misses += 1
+                    self.cache.put(slug, stamp, note)
+                found[slug] = note
+        if stale:
+            found.update(zip(stale, await self.get_many(stale, concurrency)))
+        if missing:
+            canonical = [await self._aliases.fetch(slug, None) for slug in missing]
+            redirected = [(s, c) for s, c in zip(missing, canonical) if c and c != s]
+            notes = await self.get_many([c for _, c in redirected], concurrency)
+            found.update((s, n) for (s, _), n in zip(redirected, notes) if n is not None)
+        out: list[Note | None] = []
+        seen: set[str] = set()
+        for slug in slugs:
+            note = found.get(slug)
+            if note is not None and slug in seen:       # every result is a private copy
+                note = note.model_copy(deep=True)
+            seen.add(slug)
+            out.append(note)
         return out
 
+    async def all_notes(self) -> list[Note]:
+        return await self._hydrate(await self._io_call(self._slugs_on_disk))
+
+    async def iter_notes(
+        self, *, kind: Kind | None = None, settlement: Settlement | None = None,
+        since: str | None = None, at: str | None = None, after: str | None = None,
+        page_size: int = 256,
+    ) -> AsyncIterator[Note]:
+        """Stream indexed notes in slug order, `page_size` at a time, so a
+        scan of the whole store runs in constant memory. `kind`/`settlement`
+        are answered by the FTS index and `since` (recorded_at >= since) and
+        `at` (believed at `at`) by the temporal index, so notes that cannot
+        match are never read. Resume a scan with `after=<last slug seen>`.
+
+        Only notes the store has indexed are visited; run `sync` first to
+        pick up files written behind its back."""
+        while True:
+            notes, after = await self.notes_page(kind=kind, settlement=settlement,
+                                                 since=since, at=at, after=after,
+                                                 limit=page_size)
+            for note in notes:
+                yield note
+            if after is None:
+                return
+
+    async def notes_page(
+        self, *, kind: Kind | None = None, settlement: Settlement | None = None,
+        since: str | None = None, at: str | None = None, after: str | None = None,
+        limit: int = 256,
+    ) -> tuple[list[Note], str | None]:
+        """One page of `iter_notes`: up to `limit` matching notes with slugs
+        greater than `after`, and the cursor to pass as `after` for the next
+        page (None once the scan is done)."""
+        if limit < 1:
+            raise ValueError(f"limit must be positive, not {limit}")
+        sql = ["SELECT item_id FROM __beaver_documents__ WHERE collection = ? AND item_id > ?"]
+        filters = [("kind", kind and Kind(kind).value),
+                   ("settlement", settlement and Settlement(settlement).value)]
+        for field, value in filters:
+            if value is not None:
+                sql.append(f"AND json_extract(data, '$.{field}') = ?")
+        sql.append("ORDER BY item_id LIMIT ?")
+        values = [value for _, value in filters if value is not None]
+        notes: list[Note] = []
+        cursor = after or ""
+        while True:
+            # keyset pagination over the documents' primary key
+            rows = await self._db.connection.execute(
+                " ".join(sql), ("notes", cursor, *values, limit))
+            slugs = [row["item_id"] async for row in rows]
+            if not slugs:
+                return notes, None
+            room = limit - len(notes)
+            wanted = [slug for slug in slugs if self._in_window(slug, since, at)]
+            take = wanted[:room]
+            notes += [note for note in await self.get_many(take) if note is not None]
+            if len(wanted) > room:                      # page filled mid-batch
+                return notes, take[-1]
+            cursor = slugs[-1]
+            if len(slugs) < limit:
+                return notes, None
+            if len(notes) >= limit:
+                return notes, cursor
+
+    def _in_window(self, slug: str, since: str | None, at: str | None) -> bool:
+        span = self.temporal.span(slug)
+        if span is None:
+            return True
+        return ((since is None or span.recorded_at >= since)
+                and (at is None or span.believed(at)))
+
     async def match(self, query: str, top_k: int = 5) -> list[tuple[Note, float]]:
-        results = await self._docs.search(query, on=["key"])
-        out: list[tuple[Note, float]] = []
-        for scored in results[:top_k]:
-            note = await self.get(scored.document.body.slug)
-            if note is not None:
-                out.append((note, scored.score))
-        return out
+        return await self._hydrate_scored(await self._fts(query, top_k))
 
     async def search_vector(
         self, vector: list[float], top_k: int = 5
     ) -> list[tuple[Note, float]]:
-        out: list[tuple[Note, float]] = []
-        for item in await self._vectors.near(vector, k=top_k):
-            note = await self.get(item.id)
-            if note is not None:
-                out.append((note, item.score))
+        return await self._hydrate_scored(await self._near(vector, top_k))
+
+    async def search_vector_many(
+        self, vectors: list[list[float]], top_k: int = 5, *, kind: Kind | None = None,
+    ) -> list[list[tuple[Note, float]]]:
+        """`search_vector` for many queries at once (one matrix multiply with the
+        numpy backend)."""
+        return [await self._hydrate_scored(hits)
+                for hits in await self._near_many(vectors, top_k, kind)]
+
+    async def recall(
+        self, query_text: str | None = None, query_vector: list[float] | None = None,
+        top_k: int = 5, *, kind: Kind | None = None,
+        settlement: Settlement | None = None, at: str | None = None,
+        candidates: int | None = None, rrf_k: int = 60,
+    ) -> list[tuple[Note, float]]:
+        """Hybrid recall: FTS over retrieval keys and vector search run
+        concurrently, fused by reciprocal rank (sum of 1 / (rrf_k + rank)).
+
+        `kind`/`settlement` are pushed down into both indexes, `at` keeps only
+        notes in the as-of set at that time (checked on the temporal index),
+        and only the fused top_k are hydrated."""
+        depth = candidates or 3 * top_k
+        lists = await asyncio.gather(
+            self._fts(query_text, depth, kind, settlement) if query_text else _none(),
+            self._near(query_vector, depth, kind, settlement)
+            if query_vector is not None else _none())
+        fused: dict[str, float] = {}
+        for ranked in lists:
+            for rank, (slug, _) in enumerate(ranked, start=1):
+                fused[slug] = fused.get(slug, 0.0) + 1.0 / (rrf_k + rank)
+        if at is not None:
+            fused = {slug: score for slug, score in fused.items()
+                     if (span := self.temporal.span(slug)) is None or span.believed(at)}
+        best = sorted(fused.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        return await self._hydrate_scored(best)
+
+    async def _fts(self, text: str, limit: int, kind: Kind | None = None,
+                   settlement: Settlement | None = None) -> list[tuple[str, float]]:
+        query = self._docs.query().fts(text, on=["key"]).where(
+            *self._filters(kind, settlement)).limit(limit)
+        return [(hit.document.body.slug, hit.score) for hit in await query]
+
+    async def _near(self, vector: list[float], limit: int, kind: Kind | None = None,
+                    settlement: Settlement | None = None) -> list[tuple[str, float]]:
+        return (await self._near_many([vector], limit, kind, settlement))[0]
+
+    async def _near_many(self, vectors: list[list[float]], limit: int,
+                         kind: Kind | None = None, settlement: Settlement | None = None,
+                         ) -> list[list[tuple[str, float]]]:
+        if self._matrix is not None:
+            tags = None
+            if kind is not None or settlement is not None:
+                tags = [_tag(k, s) for k in ([Kind(kind)] if kind else Kind)
+                        for s in ([Settlement(settlement)] if settlement else Settlement)]
+            return await asyncio.to_thread(self._matrix.near_many, vectors, limit, tags)
+        out = []
+        for vector in vectors:
+            hits = await self._vectors.near(
+                vector, k=limit, filters=self._filters(kind, settlement) or None)
+            out.append([(item.id, item.score) for item in hits])
+        return out
+
+    @staticmethod
+    def _filters(kind: Kind | None, settlement: Settlement | None) -> list:
+        out = []
+        if kind is not None:
+            out.append(q("kind") == Kind(kind).value)
+        if settlement is not None:
+            out.append(q("settlement") == Settlement(settlement).value)
         return out
 
     async def link(self, source_slug: str, target_slug: str, type: EdgeType,
                    order: int | None = None) -> None:
+        await self.link_many([(source_slug, target_slug, type, order)])
+
+    async def link_many(
+        self, edges: Iterable[tuple[str, str, EdgeType] | tuple[str, str, EdgeType, int | None]],
+    ) -> None:
+        """Bulk `link`. Every edge is validated before anything is written; each
+        source note is rewritten once however many edges it gains, and the graph
+        edges go to beaver in a single transaction."""
+        specs = [(source, target, type, order[0] if order else None)
+                 for source, target, type, *order in edges]
+        notes: dict[str, Note | None] = {}
+        canonical: dict[str, Note] = {}     # one object per note, even via aliases
+        slugs = list({s for spec in specs for s in spec[:2]})
+        for slug, note in zip(slugs, await self.get_many(slugs)):
+            notes[slug] = note and canonical.setdefault(note.slug, note)
+        changed: dict[str, Note] = {}
+        links: list[tuple[str, str, str, int | None]] = []
+        for source_slug, target_slug, type, order in specs:
+            source, target = notes[source_slug], notes[target_slug]
+            self._check_edge(source_slug, source, target_slug, target, type)
+            if type not in ORDERED_EDGES:
+                order = None
+            if not any(e.target == target.slug and e.type == type for e in source.edges):
+                source.edges.append(Edge(target=target.slug, type=type, order=order))
+                changed[source.slug] = source
+            links.append((source.slug, target.slug, type.value, order))
+        if changed:
+            await self.put_many(changed.values())
+        superseded = [target for source, target, label, _ in links
+                      if label == EdgeType.SUPERSEDES.value
+                      and self.temporal.supersede(source, target)]
+        async with self._db.transaction():
+            for source, target, label, order in links:
+                await self._graph.link(source, target, label=label,
+                                       metadata={"order": order})
+            await self._save_spans(superseded)
+        for source, target, label, order in links:
+            self.adjacency.add(source, target, EdgeType(label), order)
+
+    @staticmethod
+    def _check_edge(source_slug: str, source: Note | None, target_slug: str,
+                    target: Note | None, type: EdgeType) -> None:
         if source_slug == target_slug:
             raise ValueError(f"self-edge not allowed on {source_slug!r}")
-        source = await self.get(source_slug)
-        target = await self.get(target_slug)
         if source is None:
             raise ValueError(f"source note {source_slug!r} does not exist")
         if target is None:
@@ -108,73 +694,82 @@ class NoteStore:
             raise ValueError(
                 f"edge {source.kind.value} -{type.value}-> {target.kind.value} "
                 f"is not allowed (check direction/ontology)")
-        if type not in ORDERED_EDGES:
-            order = None
-        if not any(e.target == target.slug and e.type == type for e in source.edges):
-            source.edges.append(Edge(target=target.slug, type=type, order=order))
-            await self.put(source)
-        await self._graph.link(source.slug, target.slug, label=type.value,
-                               metadata={"order": order})
 
     async def neighbors(self, slug: str, type: EdgeType | None = None) -> list[Note]:
-        labels = [type.value] if type else [t.value for t in EdgeType]
-        seen: set[str] = set()
-        out: list[Note] = []
-        for label in labels:
-            async for target in self._graph.children(slug, label=label):
-                if target not in seen:
-                    seen.add(target)
-                    note = await self.get(target)
-                    if note is not None:
-                        out.append(note)
-        return out
+        """Targets of `slug`'s outgoing edges, grouped by type; STEP targets
+        come back in step order."""
+        return await self._hydrate(
+            dict.fromkeys(t for _, t, _ in self.adjacency.out(slug, type)))
 
     async def backlinks(self, slug: str, type: EdgeType | None = None) -> list[Note]:
-        labels = [type.value] if type else [t.value for t in EdgeType]
-        seen: set[str] = set()
-        out: list[Note] = []
-        for label in labels:
-            async for source in self._graph.parents(slug, label=label):
-                if source not in seen:
-                    seen.add(source)
-                    note = await self.get(source)
-                    if note is not None:
-                        out.append(note)
-        return out
+        return await self._hydrate(
+            dict.fromkeys(s for _, s, _ in self.adjacency.into(slug, type)))
+
+    async def expand(
+        self, seeds: Iterable[str] | Mapping[str, float], *,
+        weights: Mapping[EdgeType, float] | None = None, depth: int = 2,
+        decay: float = 0.5, fan_out: int | None = None, direction: str = "out",
+        states: Iterable[EpistemicState] | None = (EpistemicState.ACTIVE,),
+        at: str | None = None, top_k: int | None = None,
+    ) -> list[tuple[Note, float]]:
+        """Multi-hop context around `seeds` by spreading activation over the
+        typed edge graph (see `leto.graph.spread`), most activated first.
+        Only notes whose epistemic state at `at` is in `states` take part
+        (None disables the filter)."""
+        if not isinstance(seeds, Mapping):
+            seeds = dict.fromkeys(seeds, 1.0)
+        allow = None
+        if states is not None:
+            wanted, at = set(states), at or NOW()
+            allow = lambda slug: (slug not in self.temporal
+                                  or self.temporal.state(slug, at) in wanted)
+        scores = spread(self.adjacency, seeds, weights, depth=depth, decay=decay,
+                        fan_out=fan_out, direction=direction, allow=allow)
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        notes = await self._hydrate(slug for slug, _ in ranked)
+        return [(n, scores[n.slug]) for n in notes]
 
     async def epistemic_state(self, slug: str, at: str | None = None) -> EpistemicState:
+        return (await self.epistemic_states([slug], at))[slug]
+
+    async def epistemic_states(self, slugs: Iterable[str],
+                               at: str | None = None) -> dict[str, EpistemicState]:
+        """Epistemic state of many notes at `at`, answered from the temporal
+        index. SUPERSEDED (a superseder known by `at`) beats RETRACTED (validity
+        ended on/before `at`) beats ACTIVE."""
         at = at or NOW()
-        note = await self.get(slug)
-        if note is None:
-            raise ValueError(f"note {slug!r} does not exist")
-        # superseded: a superseding note (incoming supersedes edge) known by `at`
-        for src in await self.backlinks(slug, EdgeType.SUPERSEDES):
-            if (src.recorded_at or "") <= at:
-                return EpistemicState.SUPERSEDED
-        # retracted: its validity ended on/before `at`
-        if note.valid_to is not None and note.valid_to <= at:
-            return EpistemicState.RETRACTED
-        return EpistemicState.ACTIVE
+        out: dict[str, EpistemicState] = {}
+        for slug in slugs:
+            key = slug
+            if key not in self.temporal:
+                note = await self.get(slug)
+                if note is None:
+                    raise ValueError(f"note {slug!r} does not exist")
+                key = note.slug
+                if key not in self.temporal:          # written behind our back
+                    self.temporal.set(key, Span.of(note))
+            out[slug] = self.temporal.state(key, at)
+        return out
 
     async def as_of(self, at: str) -> list[Note]:
         """Notes LETO both knew (recorded_at <= at) and that were valid
         (valid_from <= at < valid_to) at `at` — the belief state at that time."""
-        out: list[Note] = []
-        for note in await self.all_notes():
-            known = (note.recorded_at or "") <= at
-            started = (note.valid_from or "") <= at
-            ended = note.valid_to is not None and note.valid_to <= at
-            if known and started and not ended:
-                out.append(note)
-        return out
+        return await self._hydrate(self.temporal.as_of(at))
 
     async def active_notes(self, at: str | None = None) -> list[Note]:
-        at = at or NOW()
-        out: list[Note] = []
-        for note in await self.all_notes():
-            if await self.epistemic_state(note.slug, at) == EpistemicState.ACTIVE:
-                out.append(note)
-        return out
+        return await self._hydrate(self.temporal.active(at or NOW()))
+
+    async def _hydrate(self, slugs: Iterable[str]) -> list[Note]:
+        return [note for note in await self.get_many(slugs) if note is not None]
+
+    async def _hydrate_scored(self, hits: Iterable[tuple[str, float]]
+                              ) -> list[tuple[Note, float]]:
+        hits = list(hits)
+        notes = await self.get_many(slug for slug, _ in hits)
+        return [(note, score) for note, (_, score) in zip(notes, hits) if note is not None]
 
     async def close(self) -> None:
+        if self._matrix is not None:
+            self._matrix.close()
         await self._db.close()
+        self._io.shutdown()
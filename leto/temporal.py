@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+from leto.model import EpistemicState, Note
+
+
+@dataclass(slots=True)
+class Span:
+    """The bitemporal coordinates of one note, plus the notes superseding it.
+    A missing `recorded_at`/`valid_from` is kept as "" (known/valid since forever)."""
+
+    recorded_at: str = ""
+    valid_from: str = ""
+    valid_to: str | None = None                                 # None = INF
+    superseders: dict[str, str] = field(default_factory=dict)   # slug -> its recorded_at
+
+    @classmethod
+    def of(cls, note: Note) -> "Span":
+        return cls(note.recorded_at or "", note.valid_from or "", note.valid_to)
+
+    @property
+    def superseded_at(self) -> str | None:
+        """Transaction time of the earliest-known superseder, if any."""
+        return min(self.superseders.values()) if self.superseders else None
+
+    def believed(self, at: str) -> bool:
+        """Known by `at` and valid at `at` — in the as-of set."""
+        return (self.recorded_at <= at and self.valid_from <= at
+                and (self.valid_to is None or at < self.valid_to))
+
+    def state(self, at: str) -> EpistemicState:
+        superseded_at = self.superseded_at
+        if superseded_at is not None and superseded_at <= at:
+            return EpistemicState.SUPERSEDED
+        if self.valid_to is not None and self.valid_to <= at:
+            return EpistemicState.RETRACTED
+        return EpistemicState.ACTIVE
+
+    def to_dict(self) -> dict:
+        return {"recorded_at": self.recorded_at, "valid_from": self.valid_from,
+                "valid_to": self.valid_to, "superseders": dict(self.superseders)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Span":
+        return cls(data.get("recorded_at") or "", data.get("valid_from") or "",
+                   data.get("valid_to"), dict(data.get("superseders") or {}))
+
+
+class _Bounds:
+    """A sorted multiset of timestamps at which some note changes membership."""
+
+    def __init__(self):
+        self._values: list[str] = []
+
+    def add(self, values: Iterable[str]) -> None:
+        for v in values:
+            insort(self._values, v)
+
+    def remove(self, values: Iterable[str]) -> None:
+        for v in values:
+            i = bisect_left(self._values, v)
+            if i < len(self._values) and self._values[i] == v:
+                del self._values[i]
+
+    def window(self, at: str) -> tuple[str, str | None]:
+        """The largest bound <= `at` ("" if none) and the smallest bound > `at`
+        (None = INF). Every note's membership is constant over [lo, hi)."""
+        i = bisect_right(self._values, at)
+        lo = self._values[i - 1] if i else ""
+        hi = self._values[i] if i < len(self._values) else None
+        return lo, hi
+
+
+@dataclass(slots=True)
+class _Window:
+    lo: str
+    hi: str | None
+    members: list[str]           # sorted slugs
+
+
+class _View:
+    """One derived set (as-of or active) over time: its bounds and a few
+    memoized windows that are patched in place on every write."""
+
+    MAX_WINDOWS = 4
+
+    def __init__(self, test: Callable[[Span, str], bool],
+                 bounds_of: Callable[[Span], list[str]]):
+        self.test = test
+        self.bounds_of = bounds_of
+        self.bounds = _Bounds()
+        self.windows: list[_Window] = []
+
+    def lookup(self, at: str, spans: dict[str, Span], slugs: list[str]) -> list[str]:
+        for w in self.windows:
+            if w.lo <= at and (w.hi is None or at < w.hi):
+                return w.members
+        lo, hi = self.bounds.window(at)
+        w = _Window(lo, hi, [s for s in slugs if self.test(spans[s], lo)])
+        self.windows.insert(0, w)
+        del self.windows[self.MAX_WINDOWS:]
+        return w.members
+
+    def replace(self, slug: str, old: Span | None, new: Span | None) -> None:
+        if old is not None:
+            self.bounds.remove(self.bounds_of(old))
+        new_bounds = self.bounds_of(new) if new is not None else []
+        self.bounds.add(new_bounds)
+        for w in self.windows:
+            for b in new_bounds:                 # a new bound inside splits the window
+                if w.lo < b and (w.hi is None or b < w.hi):
+                    w.hi = b
+            i = bisect_left(w.members, slug)
+            present = i < len(w.members) and w.members[i] == slug
+            wanted = new is not None and self.test(new, w.lo)
+            if present and not wanted:
+                del w.members[i]
+            elif wanted and not present:
+                w.members.insert(i, slug)
+
+
+def _believed_bounds(span: Span) -> list[str]:
+    out = [span.recorded_at, span.valid_from]
+    if span.valid_to is not None:
+        out.append(span.valid_to)
+    return out
+
+
+def _state_bounds(span: Span) -> list[str]:
+    out = [span.valid_to] if span.valid_to is not None else []
+    superseded_at = span.superseded_at
+    if superseded_at is not None:
+        out.append(superseded_at)
+    return out
+
+
+class TemporalIndex:
+    """In-memory interval index over every note's `Span`.
+
+    `as_of(T)` and `active(T)` are answered from memoized windows — the ranges
+    between consecutive bounds over which no note changes membership — so
+    repeated "what is true now" questions cost a lookup, and writes patch the
+    windows for just the note that changed."""
+
+    def __init__(self):
+        self._spans: dict[str, Span] = {}
+        self._slugs: list[str] = []                  # sorted
+        self._supersedes: dict[str, set[str]] = {}   # superseder -> superseded
+        self._as_of = _View(lambda s, at: s.believed(at), _believed_bounds)
+        self._active = _View(lambda s, at: s.state(at) is EpistemicState.ACTIVE,
+                             _state_bounds)
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._spans
+
+    def span(self, slug: str) -> Span | None:
+        return self._spans.get(slug)
+
+    def as_of(self, at: str) -> list[str]:
+        return list(self._as_of.lookup(at, self._spans, self._slugs))
+
+    def active(self, at: str) -> list[str]:
+        return list(self._active.lookup(at, self._spans, self._slugs))
+
+    def state(self, slug: str, at: str) -> EpistemicState:
+        return self._spans[slug].state(at)
+
+    def set(self, slug: str, span: Span) -> list[str]:
+        """Insert or update `slug`'s own coordinates, keeping the superseders
+        already known for it. Returns the slugs whose span changed as a result
+        (`slug` and anything it supersedes)."""
+        old = self._spans.get(slug)
+        if old is not None:
+            span.superseders = dict(old.superseders)
+        self._replace(slug, span)
+        changed = [slug]
+        for target in self._supersedes.get(slug, ()):     # our recorded_at moved
+            t = self._spans.get(target)
+            if t is not None and t.superseders.get(slug) != span.recorded_at:
+                self._replace(target, Span(t.recorded_at, t.valid_from, t.valid_to,
+                                           {**t.superseders, slug: span.recorded_at}))
+                changed.append(target)
+        return changed
+
+    def supersede(self, source: str, target: str) -> bool:
+        """Record that `source` supersedes `target`. True if `target` changed."""
+        src, t = self._spans.get(source), self._spans.get(target)
+        if src is None or t is None or t.superseders.get(source) == src.recorded_at:
+            return False
+        self._supersedes.setdefault(source, set()).add(target)
+        self._replace(target, Span(t.recorded_at, t.valid_from, t.valid_to,
+                                   {**t.superseders, source: src.recorded_at}))
+        return True
+
+    def unsupersede(self, source: str, target: str) -> bool:
+        """Forget that `source` supersedes `target`. True if `target` changed."""
+        self._supersedes.get(source, set()).discard(target)
+        t = self._spans.get(target)
+        if t is None or source not in t.superseders:
+            return False
+        rest = {s: at for s, at in t.superseders.items() if s != source}
+        self._replace(target, Span(t.recorded_at, t.valid_from, t.valid_to, rest))
+        return True
+
+    def discard(self, slug: str) -> list[str]:
+        """Drop `slug`, and its supersession of other notes. Returns the other
+        slugs whose span changed."""
+        changed = [t for t in list(self._supersedes.pop(slug, ()))
+                   if self.unsupersede(slug, t)]
+        old = self._spans.pop(slug, None)
+        if old is not None:
+            del self._slugs[bisect_left(self._slugs, slug)]
+            for source in old.superseders:
+                self._supersedes.get(source, set()).discard(slug)
+            self._as_of.replace(slug, old, None)
+            self._active.replace(slug, old, None)
+        return changed
+
+    def load(self, items: Iterable[tuple[str, Span]]) -> None:
+        """Bulk-populate from persisted spans (memoized windows are dropped)."""
+        for slug, span in items:
+            self._spans[slug] = span
+            for source in span.superseders:
+                self._supersedes.setdefault(source, set()).add(slug)
+        self._slugs = sorted(self._spans)
+        for view in (self._as_of, self._active):
+            view.windows.clear()
+            view.bounds = _Bounds()
+            view.bounds._values = sorted(
+                b for s in self._spans.values() for b in view.bounds_of(s))
+
+    def _replace(self, slug: str, span: Span) -> None:
+        old = self._spans.get(slug)
+        if old is None:
+            insort(self._slugs, slug)
+        self._spans[slug] = span
+        self._as_of.replace(slug, old, span)
+        self._active.replace(slug, old, span)
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+_GROW = 1024          # minimum capacity step, in rows
+_BLOCK = 65536        # rows scored per matrix multiply
+_RERANK = 4           # quantized search keeps k * _RERANK candidates for re-ranking
+
+
+class MatrixIndex:
+    """Embeddings in a contiguous memory-mapped float32 matrix with a slug<->row
+    map, for exact (or quantized-then-re-ranked) cosine search with NumPy.
+
+    On disk, under `path`:
+      - `vectors.f32`  capacity x dim float32 rows, L2-normalised on write
+      - `vectors.q`    optional int8/float16 copy used for the coarse pass
+      - `tags.u16`     one small integer per row, for pushed-down filters
+      - `rows.log`     append-only "+slug" / "-slug" lines; row i is the i-th "+"
+      - `meta.json`    dim and quantization
+
+    Opening maps the files without reading them. Re-setting a slug overwrites
+    its row in place; deleting tombstones it until `compact`. Scores follow
+    beaver's cosine convention: (1 - cos) / 2, lower is nearer."""
+
+    def __init__(self, path: str | Path, quantize: str | None = None):
+        if quantize not in (None, "int8", "float16"):
+            raise ValueError(f"quantize must be None, 'int8' or 'float16', not {quantize!r}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.path / "meta.json"
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        if meta and meta.get("quantize") != quantize:
+            raise ValueError(
+                f"vector index at {self.path} is quantized as {meta.get('quantize')!r}; "
+                f"rebuild it to switch to {quantize!r}")
+        self.quantize = quantize
+        self.dim: int | None = meta.get("dim")
+        self._rows: dict[str, int] = {}
+        self._slugs: list[str | None] = []          # row -> slug, None = tombstone
+        log = self.path / "rows.log"
+        if log.exists():
+            for line in log.read_text(encoding="utf-8").splitlines():
+                op, slug = line[0], line[1:]
+                if op == "+":
+                    self._rows[slug] = len(self._slugs)
+                    self._slugs.append(slug)
+                elif slug in self._rows:
+                    self._slugs[self._rows.pop(slug)] = None
+        self._log = open(log, "a", encoding="utf-8")
+        self._live = np.array([s is not None for s in self._slugs], dtype=bool)
+        self._matrix = self._quant = self._tags = None
+        if self.dim is not None:
+            self._map(self._capacity_on_disk())
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._rows
+
+    # --- storage -------------------------------------------------------------
+
+    def _qtype(self):
+        return {"int8": np.int8, "float16": np.float16}.get(self.quantize)
+
+    def _capacity_on_disk(self) -> int:
+        return (self.path / "vectors.f32").stat().st_size // (4 * self.dim)
+
+    def _map(self, capacity: int) -> None:
+        """(Re)map every file at `capacity` rows, growing them if needed."""
+        files = [("vectors.f32", np.float32, (capacity, self.dim)),
+                 ("tags.u16", np.uint16, (capacity,))]
+        if self.quantize:
+            files.append(("vectors.q", self._qtype(), (capacity, self.dim)))
+        mapped = []
+        for name, dtype, shape in files:
+            file = self.path / name
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            with open(file, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            mapped.append(np.memmap(file, dtype=dtype, mode="r+", shape=shape))
+        self._matrix, self._tags = mapped[0], mapped[1]
+        self._quant = mapped[2] if self.quantize else None
+
+    def _ensure_row(self, row: int) -> None:
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if row >= capacity:
+            self.flush()
+            self._map(max(row + 1, 2 * capacity, _GROW))
+        if row >= len(self._live):
+            self._live = np.concatenate(
+                [self._live, np.zeros(max(row + 1, 2 * len(self._live), _GROW)
+                                      - len(self._live), dtype=bool)])
+
+    def flush(self) -> None:
+        for m in (self._matrix, self._tags, self._quant):
+            if m is not None:
+                m.flush()
+        self._log.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._log.close()
+
+    # --- writes --------------------------------------------------------------
+
+    def set(self, slug: str, vector: Sequence[float], tag: int = 0) -> None:
+        v = np.asarray(vector, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(v.shape[0])
+            (self.path / "meta.json").write_text(
+                json.dumps({"dim": self.dim, "quantize": self.quantize}))
+        if v.shape != (self.dim,):
+            raise ValueError(f"vector dimension mismatch: index expects {self.dim}, "
+                             f"got {v.shape[0]}")
+        row = self._rows.get(slug)
+        if row is None:
+            row = len(self._slugs)
+            self._ensure_row(row)
+            self._log.write(f"+{slug}\n")
+            self._rows[slug] = row
+            self._slugs.append(slug)
+            self._live[row] = True
+        norm = np.linalg.norm(v)
+        v = v / norm if norm > 1e-10 else v
+        self._matrix[row] = v
+        self._tags[row] = tag
+        if self._quant is not None:
+            self._quant[row] = self._quantized(v[None, :])[0]
+
+    def delete(self, slug: str) -> None:
+        row = self._rows.pop(slug, None)
+        if row is None:
+            return
+        self._log.write(f"-{slug}\n")
+        self._slugs[row] = None
+        self._live[row] = False
+
+    def get(self, slug: str) -> np.ndarray:
+        """The stored (normalised) vector of `slug`. Raises KeyError."""
+        return np.array(self._matrix[self._rows[slug]])
+
+    def compact(self) -> None:
+        """Rewrite the files without tombstoned rows."""
+        if self.dim is None:
+            return
+        keep = [r for r, s in enumerate(self._slugs) if s is not None]
+        matrix, tags = np.array(self._matrix[keep]), np.array(self._tags[keep])
+        self.close()
+        for name in ("vectors.f32", "tags.u16", "vectors.q"):
+            (self.path / name).unlink(missing_ok=True)
+        slugs = [self._slugs[r] for r in keep]
+        (self.path / "rows.log").write_text("".join(f"+{s}\n" for s in slugs),
+                                            encoding="utf-8")
+        self._slugs, self._rows = slugs, {s: i for i, s in enumerate(slugs)}
+        self._live = np.ones(len(slugs), dtype=bool)
+        self._log = open(self.path / "rows.log", "a", encoding="utf-8")
+        self._map(max(len(slugs), _GROW))
+        self._matrix[:len(slugs)] = matrix
+        self._tags[:len(slugs)] = tags
+        if self._quant is not None:
+            self._quant[:len(slugs)] = self._quantized(matrix)
+        self.flush()
+
+    def _quantized(self, rows: np.ndarray) -> np.ndarray:
+        if self.quantize == "int8":       # rows are unit vectors: |x| <= 1
+            return np.clip(np.rint(rows * 127), -127, 127).astype(np.int8)
+        return rows.astype(np.float16)
+
+    # --- search --------------------------------------------------------------
+
+    def near(self, vector: Sequence[float], k: int = 10,
+             tags: Iterable[int] | None = None) -> list[tuple[str, float]]:
+        return self.near_many([vector], k, tags)[0]
+
+    def near_many(self, vectors: Sequence[Sequence[float]] | np.ndarray, k: int = 10,
+                  tags: Iterable[int] | None = None) -> list[list[tuple[str, float]]]:
+        """Top-k neighbours of every query row at once, via blocked matrix
+        multiplies. With quantization, the coarse pass scores the quantized
+        copy and the best k * 4 candidates are re-ranked exactly."""
+        n = len(self._slugs)
+        if not n:
+            return [[] for _ in range(len(vectors))]
+        queries = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 1e-10, norms, 1.0)
+        mask = self._live[:n].copy()
+        if tags is not None:
+            mask &= np.isin(self._tags[:n], np.fromiter(tags, dtype=np.uint16))
+        keep = k * _RERANK if self._quant is not None else k
+        best_sims = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, n, _BLOCK):
+            stop = min(start + _BLOCK, n)
+            block_mask = mask[start:stop]
+            if not block_mask.any():
+                continue
+            sims = self._score(queries, start, stop)
+            sims[:, ~block_mask] = -np.inf
+            rows = np.broadcast_to(np.arange(start, stop), sims.shape)
+            best_sims, best_rows = _top(np.concatenate([best_sims, sims], axis=1),
+                                        np.concatenate([best_rows, rows], axis=1), keep)
+        if self._quant is not None and best_rows.size:
+            exact = np.einsum("qd,qkd->qk", queries, self._matrix[best_rows])
+            exact[~np.isfinite(best_sims)] = -np.inf
+            best_sims, best_rows = _top(exact, best_rows, k)
+        out = []
+        for sims, rows in zip(best_sims, best_rows):
+            out.append([(self._slugs[r], max(0.0, float((1.0 - s) / 2.0)))
+                        for s, r in zip(sims, rows) if np.isfinite(s)])
+        return out
+
+    def _score(self, queries: np.ndarray, start: int, stop: int) -> np.ndarray:
+        if self._quant is None:
+            return queries @ np.asarray(self._matrix[start:stop]).T
+        block = np.asarray(self._quant[start:stop], dtype=np.float32)
+        if self.quantize == "int8":
+            block /= 127.0
+        return queries @ block.T
+
+
+def _top(sims: np.ndarray, rows: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """The k highest similarities per query row, best first, with their rows."""
+    if sims.shape[1] > k:
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        sims, rows = np.take_along_axis(sims, part, 1), np.take_along_axis(rows, part, 1)
+    order = np.argsort(-sims, axis=1, kind="stable")
+    return np.take_along_axis(sims, order, 1), np.take_along_axis(rows, order, 1)
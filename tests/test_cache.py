@@ -0,0 +1,33 @@
+from leto.cache import NoteCache
+from leto.model import FactPayload, Kind, Note
+
+
+def _fact(slug):
+    return Note(slug=slug, kind=Kind.FACT, title=slug.upper(),
+                payload=FactPayload(definition="d"))
+
+
+def test_hit_returns_private_copy_and_counts():
+    cache = NoteCache()
+    cache.put("a", (1, 10), _fact("a"))
+    got = cache.get("a", (1, 10))
+    got.title = "mutated"
+    assert cache.get("a", (1, 10)).title == "A"
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_stale_stamp_is_a_miss_and_drops_entry():
+    cache = NoteCache()
+    cache.put("a", (1, 10), _fact("a"))
+    assert cache.get("a", (2, 10)) is None
+    assert "a" not in cache and cache.misses == 1
+
+
+def test_lru_eviction_respects_budget():
+    cache = NoteCache(max_bytes=25)
+    cache.put("a", (1, 10), _fact("a"))
+    cache.put("b", (1, 10), _fact("b"))
+    cache.get("a", (1, 10))                  # a is now most recently used
+    cache.put("c", (1, 10), _fact("c"))
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.evictions == 1 and cache.stats()["bytes"] == 20
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from leto.embed import Embedder, MicroBatcher, key_digest
+
+
+class CountingEmbedder:
+    model_id = "count-v1"
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_key_digest_depends_on_model_and_text():
+    assert key_digest("m", "x") == key_digest("m", "x")
+    assert key_digest("m", "x") != key_digest("n", "x") != key_digest("m", "y")
+    assert isinstance(CountingEmbedder(), Embedder)
+
+
+async def test_concurrent_requests_share_one_batch():
+    embedder = CountingEmbedder()
+    batcher = MicroBatcher(embedder, max_batch=10, max_delay=0.01)
+    out = await asyncio.gather(*(batcher.embed(t) for t in ["a", "bb", "a", "ccc"]))
+    assert out == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+    assert embedder.calls == [["a", "bb", "ccc"]]
+
+
+async def test_full_batch_flushes_immediately_and_errors_propagate():
+    class Broken(CountingEmbedder):
+        def embed(self, texts):
+            raise RuntimeError("model down")
+
+    batcher = MicroBatcher(CountingEmbedder(), max_batch=2, max_delay=60)
+    assert len(await asyncio.wait_for(
+        asyncio.gather(batcher.embed("a"), batcher.embed("b")), 1)) == 2
+    with pytest.raises(RuntimeError):
+        await MicroBatcher(Broken(), max_delay=0).embed("a")
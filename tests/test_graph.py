@@ -0,0 +1,46 @@
+from leto.graph import Adjacency, spread
+from leto.model import EdgeType
+
+
+def test_edges_grouped_by_type_and_steps_ordered():
+    adj = Adjacency()
+    adj.add("p", "s2", EdgeType.STEP, 2)
+    adj.add("p", "f", EdgeType.INVOLVES)
+    adj.add("p", "s1", EdgeType.STEP, 1)
+    assert adj.out("p") == [(EdgeType.INVOLVES, "f", None), (EdgeType.STEP, "s1", 1),
+                            (EdgeType.STEP, "s2", 2)]
+    assert adj.into("s1") == [(EdgeType.STEP, "p", 1)]
+
+
+def test_relinking_replaces_the_edge():
+    adj = Adjacency()
+    adj.add("p", "s", EdgeType.STEP, 1)
+    adj.add("p", "s", EdgeType.STEP, 5)
+    assert adj.out("p", EdgeType.STEP) == [(EdgeType.STEP, "s", 5)]
+    adj.remove("p", "s", EdgeType.STEP)
+    assert adj.out("p") == [] and adj.into("s") == [] and len(adj) == 0
+
+
+def _chain():
+    adj = Adjacency()
+    adj.add("p", "q", EdgeType.DEPENDS_ON)
+    adj.add("q", "f", EdgeType.INVOLVES)
+    adj.add("p", "g", EdgeType.INVOLVES)
+    adj.add("e", "p", EdgeType.APPLIED)
+    return adj
+
+
+def test_spread_is_depth_bounded_and_decays():
+    scores = spread(_chain(), {"p": 1.0}, depth=2, decay=0.5)
+    assert scores == {"p": 1.0, "q": 0.5, "g": 0.5, "f": 0.25}
+    assert set(spread(_chain(), {"p": 1.0}, depth=1)) == {"p", "q", "g"}
+
+
+def test_spread_weights_direction_and_filter():
+    adj = _chain()
+    only_deps = spread(adj, {"p": 1.0}, {EdgeType.DEPENDS_ON: 1.0}, depth=3)
+    assert set(only_deps) == {"p", "q"}
+    both = spread(adj, {"p": 1.0}, depth=1, direction="both")
+    assert "e" in both
+    assert "q" not in spread(adj, {"p": 1.0}, allow=lambda s: s != "q")
+    assert len(spread(adj, {"p": 1.0}, depth=1, fan_out=1)) == 2
@@ -0,0 +1,28 @@
+import pytest
+
+from leto.layout import Layout, shard
+
+
+def test_paths_by_scheme(tmp_path):
+    assert Layout(tmp_path).path("alan-turing") == tmp_path / "alan-turing.md"
+    sharded = Layout(tmp_path, "sharded")
+    assert sharded.path("alan-turing") == tmp_path / shard("alan-turing") / "alan-turing.md"
+    assert len(shard("alan-turing")) == 2
+    with pytest.raises(ValueError):
+        Layout(tmp_path, "nested")
+
+
+def test_adopt_moves_files_but_keeps_newer_writes(tmp_path):
+    flat = Layout(tmp_path)
+    for slug in ("a", "b"):
+        flat.path(slug).write_text(f"old {slug}")
+    sharded = Layout(tmp_path, "sharded", previous=flat)
+    sharded.writable("b").write_text("new b")        # written mid-migration
+    assert sharded.slugs() == ["a", "b"]
+    assert sharded.stat("a")[0] == flat.path("a")
+    assert sharded.adopt(["a", "b", "ghost"]) == 1
+    assert sharded.path("a").read_text() == "old a"
+    assert sharded.path("b").read_text() == "new b"
+    assert not any(tmp_path.glob("*.md"))
+    sharded.previous = None
+    assert sharded.slugs() == ["a", "b"]
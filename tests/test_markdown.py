@@ -33,3 +33,42 @@ def test_body_is_human_readable_view():
     assert text.startswith("---")
     assert "# Do X" in text
     assert "accomplish x" in text
+
+
+import frontmatter
+import pytest
+
+from leto.markdown import _metadata, _render_body, note_from_file
+
+
+def _legacy(note):
+    return frontmatter.dumps(frontmatter.Post(_render_body(note), **_metadata(note)))
+
+
+@pytest.mark.parametrize("text", [
+    "", "plain words", "it's", "yes", "null", "2019-01-01", "1.5", "42", "- dash",
+    "a: b", "a #b", "C# and F#", "#tag", "'quoted'", "--- rule", "tab\there",
+    "line\nbreak", " padded ", "unicode é€", "emoji 😀",
+    "word " * 40 + "end", "it's " * 30, "x" * 200 + " tail",
+])
+def test_serialization_is_byte_identical_to_frontmatter(text):
+    note = Note(slug="s", kind=Kind.EXPERIENCE, title=text, sources=[text],
+                aliases=[text], valid_from=text or None, promoted_from=[text],
+                edges=[Edge(target=text, type=EdgeType.STEP, order=3)],
+                payload=ExperiencePayload(situation=text, action=text, lesson=text))
+    out = note_to_markdown(note)
+    assert out == _legacy(note)
+    assert note_from_markdown(out, "s") == note
+
+
+def test_hand_edited_yaml_falls_back_to_full_parser(tmp_path):
+    text = ("---\nkind: fact\ntitle: \"Alan\\tTuring\"  # quoted\n"
+            "payload:\n  definition: |\n    multi\n    line\n"
+            "edges:\n  - {target: b, type: relates_to}\n---\n\nbody ignored\n")
+    note = note_from_markdown(text, "alan")
+    assert note.title == "Alan\tTuring"
+    assert note.payload.definition == "multi\nline\n"
+    assert note.edges == [Edge(target="b", type=EdgeType.RELATES_TO)]
+    path = tmp_path / "alan.md"
+    path.write_text("\n" + text + "---\nnot yaml: [\n")
+    assert note_from_file(path, "alan") == note
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 import pytest_asyncio
 
@@ -51,7 +53,7 @@ async def test_search_vector_ranks_by_nearness(store):
     assert hits[0][0].slug == "a"
 
 
-from leto.model import EdgeType, ProcedurePayload
+from leto.model import Edge, EdgeType, ProcedurePayload
 
 
 def _proc(slug, title, goal=""):
@@ -126,3 +128,271 @@ async def test_active_notes_excludes_superseded(store):
     await store.link("new", "old", EdgeType.SUPERSEDES)
     slugs = [m.slug for m in await store.active_notes()]
     assert "new" in slugs and "old" not in slugs
+
+
+async def test_get_is_served_from_cache_until_file_changes(store):
+    await store.put(_fact("water", "Water", "H2O."))
+    await store.get("water")
+    await store.get("water")
+    assert store.cache.hits == 2
+    path = store.folder / "water.md"
+    path.write_text(path.read_text().replace("H2O.", "Dihydrogen monoxide."))
+    assert (await store.get("water")).payload.definition == "Dihydrogen monoxide."
+
+
+async def test_put_many_indexes_text_and_vectors(store):
+    await store.put_many([_fact("a", "A", "a mathematician"), _fact("b", "B", "a liquid")],
+                         embeddings=[[1.0, 0.0], None])
+    assert [n.slug for n, _ in await store.match("liquid")] == ["b"]
+    assert [n.slug for n, _ in await store.search_vector([1.0, 0.0], top_k=5)] == ["a"]
+    assert all(n.recorded_at for n in await store.all_notes())
+
+
+async def test_link_many_rewrites_each_source_once(store):
+    await store.put_many([_proc("p", "P"), _proc("s1", "S1"), _proc("s2", "S2"),
+                          _fact("f", "F")])
+    await store.link_many([("p", "s2", EdgeType.STEP, 2), ("p", "s1", EdgeType.STEP, 1),
+                           ("p", "f", EdgeType.INVOLVES)])
+    p = await store.get("p")
+    assert [(e.target, e.order) for e in p.edges] == [("s2", 2), ("s1", 1), ("f", None)]
+    assert {n.slug for n in await store.neighbors("p")} == {"s1", "s2", "f"}
+
+
+async def test_link_many_is_all_or_nothing_on_validation(store):
+    await store.put_many([_proc("p", "P"), _fact("f", "F")])
+    with pytest.raises(ValueError):
+        await store.link_many([("p", "f", EdgeType.INVOLVES),
+                               ("f", "p", EdgeType.INVOLVES)])     # second points up
+    assert (await store.get("p")).edges == []
+    assert await store.neighbors("p") == []
+
+
+async def test_epistemic_states_batched(store):
+    await store.put_many([_fact("old", "Old"), _fact("new", "New"), _fact("x", "X")])
+    await store.link("new", "old", EdgeType.SUPERSEDES)
+    assert await store.epistemic_states(["old", "new"]) == {
+        "old": EpistemicState.SUPERSEDED, "new": EpistemicState.ACTIVE}
+    with pytest.raises(ValueError):
+        await store.epistemic_states(["ghost"])
+
+
+async def test_temporal_index_persists_and_rebuilds(tmp_path):
+    folder, db = tmp_path / "notes", tmp_path / "leto.db"
+    s = await NoteStore.open(folder=folder, db_path=db)
+    await s.put_many([_fact("old", "Old"), _fact("new", "New")])
+    await s.link("new", "old", EdgeType.SUPERSEDES)
+    await s.close()
+    s = await NoteStore.open(folder=folder, db_path=db)
+    assert [n.slug for n in await s.active_notes()] == ["new"]
+    await s.close()
+    # a fresh database over an existing folder derives the index from markdown
+    s = await NoteStore.open(folder=folder, db_path=tmp_path / "other.db")
+    assert [n.slug for n in await s.active_notes()] == ["new"]
+    await s.close()
+
+
+async def test_neighbors_returns_steps_in_order_after_reopen(tmp_path):
+    folder, db = tmp_path / "notes", tmp_path / "leto.db"
+    s = await NoteStore.open(folder=folder, db_path=db)
+    await s.put_many([_proc("p", "P"), _proc("s1", "S1"), _proc("s2", "S2"),
+                      _proc("s3", "S3"), _fact("f", "F")])
+    await s.link_many([("p", "s3", EdgeType.STEP, 3), ("p", "f", EdgeType.INVOLVES),
+                       ("p", "s1", EdgeType.STEP, 1), ("p", "s2", EdgeType.STEP, 2)])
+    await s.close()
+    s = await NoteStore.open(folder=folder, db_path=db)
+    assert [n.slug for n in await s.neighbors("p")] == ["f", "s1", "s2", "s3"]
+    assert [n.slug for n in await s.neighbors("p", EdgeType.STEP)] == ["s1", "s2", "s3"]
+    assert [n.slug for n in await s.backlinks("s2")] == ["p"]
+    await s.close()
+
+
+async def test_expand_follows_typed_chains_and_skips_superseded(store):
+    await store.put_many([_proc("p", "P"), _proc("q", "Q"), _fact("f", "F"),
+                          _fact("f2", "F2")])
+    await store.link_many([("p", "q", EdgeType.DEPENDS_ON), ("q", "f", EdgeType.INVOLVES),
+                           ("f2", "f", EdgeType.SUPERSEDES)])
+    hits = await store.expand(["p"], depth=2)
+    assert [(n.slug, score) for n, score in hits] == [("p", 1.0), ("q", 0.5)]
+    hits = await store.expand(["p"], depth=2, states=None)
+    assert [n.slug for n, _ in hits] == ["p", "q", "f"]
+
+
+from leto.model import Settlement
+
+
+async def test_recall_fuses_text_and_vector_hits(store):
+    await store.put_many(
+        [_fact("turing", "Turing", "a mathematician"), _fact("water", "Water", "a liquid"),
+         _proc("compute", "Compute", "do mathematician work")],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [0.9, 0.1]])
+    hits = await store.recall("mathematician", [1.0, 0.0], top_k=2)
+    assert {n.slug for n, _ in hits} == {"turing", "compute"}
+    facts = await store.recall("mathematician", [1.0, 0.0], top_k=5, kind=Kind.FACT)
+    assert {n.slug for n, _ in facts} == {"turing", "water"}
+    only_text = await store.recall("liquid", top_k=5)
+    assert [n.slug for n, _ in only_text] == ["water"]
+
+
+async def test_recall_filters_settlement_and_as_of(store):
+    old = _fact("old", "Old", "a mathematician")
+    old.recorded_at, old.valid_to = "2019-01-01", "2020-01-01"
+    settled = _fact("settled", "Settled", "a mathematician")
+    settled.settlement = Settlement.ESTABLISHED
+    await store.put_many([old, settled])
+    hits = await store.recall("mathematician", settlement=Settlement.ESTABLISHED)
+    assert [n.slug for n, _ in hits] == ["settled"]
+    hits = await store.recall("mathematician", at="2019-06-01")
+    assert [n.slug for n, _ in hits] == ["old"]
+
+
+async def test_numpy_vector_backend(tmp_path):
+    s = await NoteStore.open(folder=tmp_path / "notes", db_path=tmp_path / "leto.db",
+                             vector_backend="numpy")
+    await s.put_many([_fact("a", "A"), _fact("b", "B"), _proc("p", "P")],
+                     embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 0.1]])
+    assert [n.slug for n, _ in await s.search_vector([1.0, 0.0], top_k=2)] == ["a", "p"]
+    hits = await s.recall(query_vector=[1.0, 0.0], kind=Kind.PROCEDURE)
+    assert [n.slug for n, _ in hits] == ["p"]
+    many = await s.search_vector_many([[1.0, 0.0], [0.0, 1.0]], top_k=1)
+    assert [[n.slug for n, _ in hits] for hits in many] == [["a"], ["b"]]
+    await s.close()
+
+
+class CountingEmbedder:
+    model_id = "count-v1"
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+async def test_embedder_skips_unchanged_retrieval_keys(tmp_path):
+    embedder = CountingEmbedder()
+    s = await NoteStore.open(folder=tmp_path / "notes", db_path=tmp_path / "leto.db",
+                             embedder=embedder)
+    await asyncio.gather(s.put(_proc("p", "P", "cook rice")), s.put(_fact("f", "F", "x")))
+    assert embedder.calls == [["cook rice", "F. x"]]         # one coalesced batch
+    await s.link("p", "f", EdgeType.INVOLVES)                 # re-puts p, same key
+    p = await s.get("p")
+    p.settlement = Settlement.ESTABLISHED
+    await s.put(p)
+    assert len(embedder.calls) == 1
+    assert [n.slug for n, _ in await s.search_vector([9.0, 1.0], top_k=1)] == ["p"]
+    p.payload.goal = "cook pasta"
+    await s.put(p)
+    assert embedder.calls[-1] == ["cook pasta"]
+    await s.close()
+
+
+from leto.markdown import note_to_markdown
+
+
+async def test_sync_picks_up_out_of_band_edits_adds_and_deletes(tmp_path):
+    s = await NoteStore.open(folder=tmp_path / "notes", db_path=tmp_path / "leto.db")
+    await s.put_many([_fact("a", "A", "a bird"), _fact("b", "B", "a fish"),
+                      _proc("p", "P", "go")])
+    await s.link("p", "a", EdgeType.INVOLVES)
+    folder = tmp_path / "notes"
+    a = await s.get("a")
+    a.payload.definition = "a reptile"
+    (folder / "a.md").write_text(note_to_markdown(a), encoding="utf-8")
+    (folder / "c.md").write_text(note_to_markdown(_fact("c", "C", "a mammal")),
+                                 encoding="utf-8")
+    (folder / "b.md").unlink()
+    p = await s.get("p")
+    p.edges = [Edge(target="c", type=EdgeType.INVOLVES)]
+    (folder / "p.md").write_text(note_to_markdown(p), encoding="utf-8")
+    (folder / "c.md").touch()
+    report = await s.sync()
+    assert (report.added, report.changed, report.removed) == (["c"], ["a", "p"], ["b"])
+    assert [n.slug for n, _ in await s.match("reptile")] == ["a"]
+    assert await s.match("fish") == []
+    assert [n.slug for n in await s.neighbors("p")] == ["c"]
+    assert await s.backlinks("a") == []
+    assert "b" not in s.temporal
+    assert (await s.sync()).changed == []
+    await s.close()
+
+
+async def test_sync_on_open_reconciles_supersession(tmp_path):
+    s = await NoteStore.open(folder=tmp_path / "notes", db_path=tmp_path / "leto.db")
+    await s.put_many([_fact("old", "Old"), _fact("new", "New")])
+    new = await s.get("new")
+    await s.close()
+    path = tmp_path / "notes" / "new.md"
+    new.edges = [Edge(target="old", type=EdgeType.SUPERSEDES)]
+    path.write_text(note_to_markdown(new), encoding="utf-8")
+    s = await NoteStore.open(folder=tmp_path / "notes", db_path=tmp_path / "leto.db",
+                             sync=True)
+    assert await s.epistemic_state("old") is EpistemicState.SUPERSEDED
+    new.edges = []
+    path.write_text(note_to_markdown(new), encoding="utf-8")
+    report = await s.sync(workers=1, parallel_threshold=1)      # parse in a process pool
+    assert report.changed == ["new"]
+    assert await s.epistemic_state("old") is EpistemicState.ACTIVE
+    await s.close()
+
+
+async def test_get_many_reads_on_the_io_pool_in_order(store, monkeypatch):
+    import threading
+    import leto.store
+    await store.put_many([_fact(f"n{i}", f"N{i}") for i in range(70)])
+    store.cache.clear()
+    threads = set()
+    real = leto.store.note_from_file
+
+    def spy(path, slug):
+        threads.add(threading.current_thread().name)
+        return real(path, slug)
+
+    monkeypatch.setattr(leto.store, "note_from_file", spy)
+    await store._aliases.set("old-n3", "n3")
+    slugs = ["n5", "ghost", "n69", "old-n3", "n5"]
+    notes = await store.get_many(slugs, concurrency=2)
+    assert [n and n.slug for n in notes] == ["n5", None, "n69", "n3", "n5"]
+    assert notes[0] is not notes[4]
+    assert threads and all(t.startswith("leto-io") for t in threads)
+    assert [n.slug for n in await store.all_notes()] == sorted(f"n{i}" for i in range(70))
+
+
+async def test_iter_notes_streams_filtered_pages_in_slug_order(store):
+    notes = [_fact(f"f{i:02}", f"F{i}") for i in range(12)] + [_proc("p1", "P1")]
+    for i, note in enumerate(notes):
+        note.recorded_at = f"2026-01-{i + 1:02}"
+    await store.put_many(notes)
+    facts = [n.slug async for n in store.iter_notes(kind=Kind.FACT, page_size=5)]
+    assert facts == [f"f{i:02}" for i in range(12)]
+    recent = [n.slug async for n in store.iter_notes(since="2026-01-10", page_size=2)]
+    assert recent == ["f09", "f10", "f11", "p1"]
+    page, cursor = await store.notes_page(kind=Kind.FACT, since="2026-01-03", limit=4)
+    assert [n.slug for n in page] == ["f02", "f03", "f04", "f05"]
+    rest = [n.slug async for n in store.iter_notes(kind=Kind.FACT, after=cursor)]
+    assert rest == [f"f{i:02}" for i in range(6, 12)]
+    assert [n.slug async for n in store.iter_notes(settlement=Settlement.PERMANENT)] == []
+
+
+async def test_sharded_layout_is_recorded_and_migrated_online(tmp_path):
+    folder, db = tmp_path / "notes", tmp_path / "leto.db"
+    s = await NoteStore.open(folder=folder, db_path=db)
+    await s.put_many([_fact(f"n{i}", f"N{i}", "a bird") for i in range(5)])
+    await s.get("n0")                                  # cached across the move
+    moving = asyncio.create_task(s.migrate_layout("sharded"))
+    await s.put(_fact("n5", "N5"))
+    assert await moving == 5
+    assert not any(folder.glob("*.md"))
+    assert [n.slug for n in await s.all_notes()] == [f"n{i}" for i in range(6)]
+    assert s.cache.get("n0", s.cache.stamp("n0")) is not None
+    assert (await s.sync()).changed == []
+    await s.close()
+
+    with pytest.raises(ValueError, match="migrate_layout"):
+        await NoteStore.open(folder=folder, db_path=db, layout="flat")
+    s = await NoteStore.open(folder=folder, db_path=db)
+    assert s.layout.scheme == "sharded"
+    assert (await s.get("n3")).title == "N3"
+    assert await s.migrate_layout("flat") == 6
+    assert sorted(p.name for p in folder.iterdir()) == [f"n{i}.md" for i in range(6)]
+    await s.close()
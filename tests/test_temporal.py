@@ -0,0 +1,61 @@
+import random
+
+from leto.model import EpistemicState
+from leto.temporal import Span, TemporalIndex
+
+
+def test_span_state_precedence():
+    span = Span("2020", "2020", "2022", {"new": "2021"})
+    assert span.state("2020-06") is EpistemicState.ACTIVE
+    assert span.state("2021-06") is EpistemicState.SUPERSEDED
+    assert span.state("2023") is EpistemicState.SUPERSEDED      # superseded beats retracted
+    assert Span.from_dict(span.to_dict()) == span
+
+
+def test_supersede_tracks_superseder_recorded_at():
+    index = TemporalIndex()
+    index.set("old", Span("2020", "2020"))
+    index.set("new", Span("2022", "2022"))
+    assert index.supersede("new", "old")
+    assert index.state("old", "2021") is EpistemicState.ACTIVE
+    index.set("new", Span("2019", "2019"))                       # re-recorded earlier
+    assert index.state("old", "2021") is EpistemicState.SUPERSEDED
+
+
+def test_memoized_windows_match_a_full_scan_under_writes():
+    rng = random.Random(7)
+    years = [f"{y}" for y in range(2000, 2030)]
+    index, spans = TemporalIndex(), {}
+
+    def pick():
+        return rng.choice(years)
+
+    for step in range(400):
+        slug = f"n{rng.randrange(60)}"
+        if rng.random() < 0.8 or len(spans) < 2:
+            start = pick()
+            spans[slug] = Span(start, max(start, pick()),
+                               rng.choice([None, pick()]))
+            index.set(slug, Span(spans[slug].recorded_at, spans[slug].valid_from,
+                                 spans[slug].valid_to))
+        else:
+            a, b = rng.sample(sorted(spans), 2)
+            index.supersede(a, b)
+        at = pick()
+        truth = {s: index.span(s) for s in spans}
+        assert index.as_of(at) == sorted(s for s, sp in truth.items() if sp.believed(at))
+        assert index.active(at) == sorted(
+            s for s, sp in truth.items() if sp.state(at) is EpistemicState.ACTIVE)
+
+
+def test_discard_and_unsupersede():
+    index = TemporalIndex()
+    index.set("old", Span("2020", "2020"))
+    index.set("new", Span("2021", "2021"))
+    index.supersede("new", "old")
+    assert index.active("2022") == ["new"]
+    assert index.unsupersede("new", "old")
+    assert index.active("2022") == ["new", "old"]
+    index.supersede("new", "old")
+    assert index.discard("new") == ["old"]
+    assert "new" not in index and index.active("2022") == ["old"]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from leto.vectors import MatrixIndex
+
+
+def _index(tmp_path, **kw):
+    index = MatrixIndex(tmp_path / "vectors", **kw)
+    index.set("a", [1.0, 0.0, 0.0], tag=1)
+    index.set("b", [0.0, 1.0, 0.0], tag=2)
+    index.set("c", [0.7, 0.7, 0.0], tag=1)
+    return index
+
+
+def test_near_ranks_by_cosine_with_beaver_scores(tmp_path):
+    index = _index(tmp_path)
+    hits = index.near([1.0, 0.1, 0.0], k=2)
+    assert [s for s, _ in hits] == ["a", "c"]
+    assert hits[0][1] == pytest.approx((1 - 1 / np.sqrt(1.01)) / 2, abs=1e-6)
+    assert [s for s, _ in index.near([0.0, 1.0, 0.0], k=3, tags=[1])] == ["c", "a"]
+
+
+def test_batched_queries_and_tombstones_survive_reopen(tmp_path):
+    index = _index(tmp_path)
+    index.delete("a")
+    index.set("c", [0.0, 0.0, 1.0], tag=1)                 # overwritten in place
+    index.close()
+    index = MatrixIndex(tmp_path / "vectors")
+    first, second = index.near_many([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]], k=1)
+    assert "a" not in index and len(index) == 2
+    assert first[0][0] == "b" and second[0][0] == "c"
+    index.compact()
+    assert [s for s, _ in index.near([0.0, 0.0, 1.0], k=5)] == ["c", "b"]
+
+
+@pytest.mark.parametrize("quantize", ["int8", "float16"])
+def test_quantized_search_reranks_exactly(tmp_path, quantize):
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(300, 16)).astype(np.float32)
+    exact, quant = MatrixIndex(tmp_path / "e"), MatrixIndex(tmp_path / "q", quantize)
+    for i, v in enumerate(data):
+        exact.set(f"n{i}", v)
+        quant.set(f"n{i}", v)
+    queries = data[:20] + 0.01
+    for got, want in zip(quant.near_many(queries, k=3), exact.near_many(queries, k=3)):
+        assert [s for s, _ in got] == [s for s, _ in want]
+        assert [d for _, d in got] == pytest.approx([d for _, d in want], abs=1e-6)
+    with pytest.raises(ValueError):
+        MatrixIndex(tmp_path / "q", None)